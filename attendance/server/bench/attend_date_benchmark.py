@@ -0,0 +1,168 @@
+"""
+Compares the day-based attendance lookups before and after the attend_date
+column: DATE(time_in) = ? on an unindexed table versus attend_date = ? on
+the (srcode, attend_date) and (attend_date, time_in) indexes.
+
+    python bench/attend_date_benchmark.py --days 365 --per-day 400
+
+It fills two scratch tables (bench_attendance_plain and
+bench_attendance_indexed) with the same synthetic year of check-ins in the
+configured database, times both query shapes on each, and drops the tables
+again unless --keep is given.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_db_connection  # noqa: E402
+
+PLAIN = "bench_attendance_plain"
+INDEXED = "bench_attendance_indexed"
+
+QUERIES = {
+    "check-in lookup": (
+        f"SELECT id FROM {PLAIN} WHERE srcode = %s AND DATE(time_in) = %s",
+        f"SELECT id FROM {INDEXED} WHERE srcode = %s AND attend_date = %s",
+    ),
+    "day listing": (
+        f"SELECT id, srcode, time_in FROM {PLAIN} WHERE DATE(time_in) = %s ORDER BY time_in DESC",
+        f"SELECT id, srcode, time_in FROM {INDEXED} WHERE attend_date = %s ORDER BY time_in DESC",
+    ),
+}
+
+
+def create_tables(cursor) -> None:
+    cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {INDEXED}")
+    # the attendance table as it was before migrations 4 and 5
+    cursor.execute(
+        f"""
+        CREATE TABLE {PLAIN} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            srcode VARCHAR(64) NOT NULL,
+            time_in DATETIME NOT NULL,
+            time_out DATETIME NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TABLE {INDEXED} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            srcode VARCHAR(64) NOT NULL,
+            time_in DATETIME NOT NULL,
+            time_out DATETIME NOT NULL,
+            attend_date DATE AS (DATE(time_in)) STORED,
+            UNIQUE KEY uq_srcode_day (srcode, attend_date),
+            KEY idx_day_time (attend_date, time_in)
+        )
+        """
+    )
+
+
+def synthetic_rows(days: int, per_day: int, students: int, start: date):
+    srcodes = [f"bench-{i:05d}" for i in range(students)]
+    for offset in range(days):
+        day = datetime.combine(start + timedelta(days=offset), datetime.min.time())
+        for srcode in random.sample(srcodes, min(per_day, students)):
+            time_in = day + timedelta(minutes=random.randint(7 * 60, 17 * 60))
+            yield srcode, time_in, time_in + timedelta(hours=random.randint(1, 8))
+
+
+def fill(db, cursor, rows, chunk: int = 5000) -> int:
+    total, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk:
+            total += _insert(db, cursor, batch)
+    return total + _insert(db, cursor, batch)
+
+
+def _insert(db, cursor, batch: list) -> int:
+    if not batch:
+        return 0
+    for table in (PLAIN, INDEXED):
+        cursor.executemany(
+            f"INSERT INTO {table} (srcode, time_in, time_out) VALUES (%s, %s, %s)", batch
+        )
+    db.commit()
+    count = len(batch)
+    batch.clear()
+    return count
+
+
+def time_query(cursor, sql: str, params_list: list) -> list:
+    timings = []
+    for params in params_list:
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def explain_rows(cursor, sql: str, params: tuple) -> int:
+    cursor.execute("EXPLAIN " + sql, params)
+    return sum(row["rows"] or 0 for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DATE(time_in) vs attend_date lookups.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=400, help="check-ins per day")
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="leave the scratch tables in place")
+    args = parser.parse_args()
+
+    random.seed(42)
+    start = date.today() - timedelta(days=args.days)
+    db = get_db_connection()
+    cursor = db.cursor()
+    try:
+        create_tables(cursor)
+        started = time.perf_counter()
+        total = fill(db, cursor, synthetic_rows(args.days, args.per_day, args.students, start))
+        print(f"📦 Inserted {total} check-ins per table in {time.perf_counter() - started:.1f}s")
+        for table in (PLAIN, INDEXED):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+
+        days = [start + timedelta(days=random.randrange(args.days)) for _ in range(args.iterations)]
+        srcodes = [f"bench-{random.randrange(args.students):05d}" for _ in range(args.iterations)]
+        params = {
+            "check-in lookup": list(zip(srcodes, days)),
+            "day listing": [(day,) for day in days],
+        }
+
+        for name, (before_sql, after_sql) in QUERIES.items():
+            before = time_query(cursor, before_sql, params[name])
+            after = time_query(cursor, after_sql, params[name])
+            sample = params[name][0]
+            print(f"\n⏱️  {name} ({args.iterations} runs)")
+            print(
+                f"   DATE(time_in): mean {statistics.mean(before):.2f} ms · "
+                f"p95 {sorted(before)[int(len(before) * 0.95) - 1]:.2f} ms · "
+                f"~{explain_rows(cursor, before_sql, sample)} rows examined"
+            )
+            print(
+                f"   attend_date:   mean {statistics.mean(after):.2f} ms · "
+                f"p95 {sorted(after)[int(len(after) * 0.95) - 1]:.2f} ms · "
+                f"~{explain_rows(cursor, after_sql, sample)} rows examined"
+            )
+            print(f"   speedup:       {statistics.mean(before) / max(statistics.mean(after), 1e-6):.1f}x")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {INDEXED}")
+        cursor.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
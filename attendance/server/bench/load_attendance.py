@@ -0,0 +1,90 @@
+"""
+Load test for POST /attendance: fires many check-ins at once and reports
+latency percentiles.
+
+    python bench/load_attendance.py --url http://localhost:8000 --requests 1000 --concurrency 200
+
+To compare before and after a change, start the server from each revision
+against the same test database and run this with the same arguments. Every
+run checks in fresh, random srcodes, so it writes real rows: point it at a
+scratch database, never at production.
+"""
+
+import argparse
+import json
+import secrets
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+
+
+def make_token(srcode: str) -> str:
+    # the server skips signature verification, any key will do
+    payload = {"srcode": srcode, "fullname": f"Load Test {srcode}", "type": "student"}
+    return jwt.encode(payload, "load-test", algorithm="HS256")
+
+
+def post_attendance(url: str, token: str, timeout: float) -> tuple:
+    body = json.dumps({"token": token, "hours": 1}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/attendance", data=body, headers={"Content-Type": "application/json"}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return time.perf_counter() - started, status
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /attendance load test.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    run_id = secrets.token_hex(3)
+    tokens = [make_token(f"lt-{run_id}-{i}") for i in range(args.requests)]
+
+    print(f"🚀 {args.requests} check-ins, {args.concurrency} at a time, against {args.url}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(
+            executor.map(lambda token: post_attendance(args.url, token, args.timeout), tokens)
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for seconds, status in results if status == 200]
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"   status codes: {statuses}")
+    print(f"   throughput:   {len(results) / elapsed:.1f} req/s")
+    if not latencies:
+        print("❌ No successful requests")
+        return
+    print(
+        f"   latency ms:   p50 {percentile(latencies, 50):.0f} · p95 {percentile(latencies, 95):.0f}"
+        f" · p99 {percentile(latencies, 99):.0f} · max {max(latencies):.0f}"
+        f" · mean {statistics.mean(latencies):.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+import os
+import asyncio
+import functools
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from cache import TTLCache, MISSING
+from database import pool
+from utils import clean_isbn, is_valid_isbn, to_isbn13
+
+GOOGLE_BOOKS_URL = "https://www.googleapis.com/books/v1/volumes"
+# Kept well under the kiosk's read timeout so the kiosk hears back (and can
+# fall back to its own cache) instead of timing out itself.
+UPSTREAM_TIMEOUT = float(os.getenv("BOOKS_UPSTREAM_TIMEOUT", "4"))
+
+# Book lookups that miss the cache can wait on Google Books, so they run on
+# their own small executor rather than holding db_executor workers.
+books_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BOOKS_UPSTREAM_WORKERS", "4")), thread_name_prefix="books-upstream"
+)
+
+# Hot ISBNs stay in memory; "not found" answers expire sooner so a book added
+# upstream later is picked up.
+book_cache = TTLCache(ttl=3600, maxsize=int(os.getenv("BOOK_CACHE_SIZE", "2048")))
+NEGATIVE_TTL = 300
+
+
+class UpstreamError(Exception):
+    """Raised when Google Books cannot be reached or answers with an error."""
+
+
+class UpstreamTimeout(UpstreamError):
+    """Raised when Google Books does not answer within UPSTREAM_TIMEOUT."""
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller
+    runs the function and everyone else waiting on that key gets its result
+    (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+_flight = SingleFlight()
+
+
+def normalize_isbn(isbn: str) -> str:
+    isbn = clean_isbn(isbn).upper()
+    if not is_valid_isbn(isbn):
+        raise ValueError("Invalid ISBN. Must be 10 or 13 characters.")
+    return to_isbn13(isbn)
+
+
+def fetch_upstream(isbn13: str) -> Optional[dict]:
+    query = urllib.parse.urlencode({"q": f"isbn:{isbn13}"})
+    try:
+        with urllib.request.urlopen(
+            f"{GOOGLE_BOOKS_URL}?{query}", timeout=UPSTREAM_TIMEOUT
+        ) as response:
+            data = json.load(response)
+    except (urllib.error.URLError, TimeoutError, ValueError) as e:
+        if isinstance(e, TimeoutError) or isinstance(getattr(e, "reason", None), TimeoutError):
+            raise UpstreamTimeout(f"Google Books did not answer in {UPSTREAM_TIMEOUT:g}s") from e
+        raise UpstreamError(f"Google Books lookup failed: {e}") from e
+
+    if not data.get("items"):
+        return None
+    volume = data["items"][0]["volumeInfo"]
+    return {
+        "isbn": isbn13,
+        "bookname": volume.get("title", "Unknown Title"),
+        "bookauthor": ", ".join(volume.get("authors", [])) or "Unknown",
+        "thumbnail_url": volume.get("imageLinks", {}).get("thumbnail"),
+    }
+
+
+def _load_from_db(isbn13: str) -> Optional[dict]:
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "SELECT isbn, bookname, bookauthor, thumbnail_url FROM books WHERE isbn = %s",
+                (isbn13,),
+            )
+            return cursor.fetchone()
+
+
+def save_books(cursor, books: list) -> None:
+    """Upserts book metadata; existing titles are kept, missing covers filled in."""
+    cursor.executemany(
+        """
+        INSERT INTO books (isbn, bookname, bookauthor, thumbnail_url)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE thumbnail_url = COALESCE(thumbnail_url, VALUES(thumbnail_url))
+        """,
+        [
+            (book["isbn"], book["bookname"], book["bookauthor"], book["thumbnail_url"])
+            for book in books
+        ],
+    )
+
+
+def _resolve(isbn13: str) -> Optional[dict]:
+    book = _load_from_db(isbn13)
+    if book is None:
+        book = fetch_upstream(isbn13)
+        if book is not None:
+            with pool.connection() as db:
+                with db.cursor() as cursor:
+                    save_books(cursor, [book])
+                db.commit()
+    book_cache.set(isbn13, book, ttl=None if book else NEGATIVE_TTL)
+    return book
+
+
+def lookup_book(isbn13: str) -> Optional[dict]:
+    """
+    Resolves book metadata from the in-memory cache, then the books table,
+    and only then Google Books. Concurrent misses for one ISBN share a
+    single database query and upstream request.
+    """
+    book = book_cache.get(isbn13)
+    if book is not MISSING:
+        return book
+    return _flight.do(isbn13, lambda: _resolve(isbn13))
+
+
+async def run_books(fn, *args, **kwargs):
+    """
+    Runs a blocking book lookup on books_executor and awaits it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        books_executor, functools.partial(fn, *args, **kwargs)
+    )
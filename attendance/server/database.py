@@ -1,4 +1,14 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import pymysql
+from pymysql.constants import SERVER_STATUS
 from pymysql.cursors import DictCursor
 
 
@@ -12,6 +22,259 @@ def get_db_connection():
     )
 
 
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pymysql connections.
+
+    Connections are handed out LIFO so the hottest ones stay warm. A connection
+    that sat idle longer than `ping_after` seconds is pinged before it is
+    handed out, and connections older than `max_lifetime` or idle longer than
+    `max_idle` are closed and replaced instead of being reused.
+    """
+
+    def __init__(
+        self,
+        factory=get_db_connection,
+        min_size: int = 2,
+        max_size: int = 10,
+        checkout_timeout: float = 10.0,
+        ping_after: float = 30.0,
+        max_idle: float = 300.0,
+        max_lifetime: float = 3600.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, last_used)
+        self._created_at = {}  # id(connection) -> creation time
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._opened = 0
+        self._recycled = 0
+        self._failed_pings = 0
+        self._checkout_total = 0.0
+        self._checkout_max = 0.0
+
+    def warm(self) -> None:
+        """Open connections until the pool holds at least `min_size`."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn, last_used = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.checkout_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            if conn is None:
+                conn = self._open()
+            else:
+                conn = self._validate(conn, last_used)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_total += elapsed
+            self._checkout_max = max(self._checkout_max, elapsed)
+        return conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        if conn is None:
+            return
+        if not discard and conn.open:
+            try:
+                # Never hand out a connection with a half-finished transaction.
+                if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn.rollback()
+            except pymysql.MySQLError:
+                discard = True
+        else:
+            discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            expired = self._collect_expired_idle()
+            self._cond.notify()
+
+        if discard:
+            self._close(conn)
+        for stale in expired:
+            self._close(stale)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "opened": self._opened,
+                "recycled": self._recycled,
+                "failed_pings": self._failed_pings,
+                "checkout_avg_ms": (
+                    round(self._checkout_total / self._checkouts * 1000, 3)
+                    if self._checkouts
+                    else 0.0
+                ),
+                "checkout_max_ms": round(self._checkout_max * 1000, 3),
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+    def _open(self):
+        conn = self.factory()
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._opened += 1
+        return conn
+
+    def _close(self, conn) -> None:
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _validate(self, conn, last_used: float):
+        now = time.monotonic()
+        created_at = self._created_at.get(id(conn), now)
+        if now - created_at > self.max_lifetime or now - last_used > self.max_idle:
+            with self._cond:
+                self._recycled += 1
+            self._close(conn)
+            return self._open()
+        if now - last_used > self.ping_after:
+            try:
+                conn.ping(reconnect=False)
+            except pymysql.MySQLError:
+                with self._cond:
+                    self._failed_pings += 1
+                self._close(conn)
+                return self._open()
+        return conn
+
+    def _collect_expired_idle(self) -> list:
+        # caller holds self._cond; oldest idle connections sit at the left
+        expired = []
+        now = time.monotonic()
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._recycled += 1
+            expired.append(conn)
+        return expired
+
+
+pool = ConnectionPool(
+    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    checkout_timeout=float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "10")),
+    ping_after=float(os.getenv("DB_POOL_PING_AFTER", "30")),
+    max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+)
+
+# Blocking pymysql work runs here so request handlers never stall the event
+# loop. It is sized to the pool's max_size, but the outbox dispatcher, the
+# scheduled jobs and book lookups (books_executor) borrow connections from the
+# same pool, so a worker can still wait up to checkout_timeout for one (and
+# the request then gets a 503).
+db_executor = ThreadPoolExecutor(
+    max_workers=pool.max_size, thread_name_prefix="db-worker"
+)
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Runs a blocking database function on the dedicated executor and awaits it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        db_executor, functools.partial(fn, *args, **kwargs)
+    )
+
+
 def test_connection():
     try:
         connection = get_db_connection()
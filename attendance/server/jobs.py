@@ -0,0 +1,256 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pymysql
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from database import pool
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+# A claim is a lease the running worker keeps renewing; if it dies, the lease
+# runs out and another worker may take the run over.
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+# Minutes to wait before each further try of a run that has not succeeded
+# (it failed, or its worker died); once they are used up the job gives up
+# until its next slot.
+RETRY_MINUTES = tuple(
+    int(minutes) for minutes in os.getenv("JOB_RETRY_MINUTES", "10,30,90").split(",") if minutes
+)
+
+
+def claim_run(job_name: str, run_key: str) -> bool:
+    """
+    Takes the lease on a run in job_runs. The (job_name, run_key) primary key
+    lets exactly one process insert the row, however many server workers fire
+    the same schedule. Later attempts take over the row only if it failed or
+    its lease ran out; a succeeded run is never claimed again.
+    """
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            try:
+                cursor.execute(
+                    """
+                    INSERT INTO job_runs (job_name, run_key, owner, status, lease_until)
+                    VALUES (%s, %s, %s, 'running', NOW() + INTERVAL %s SECOND)
+                    """,
+                    (job_name, run_key, OWNER, LEASE_SECONDS),
+                )
+                claimed = True
+            except pymysql.IntegrityError:
+                # rows claimed before leases existed count from started_at
+                cursor.execute(
+                    """
+                    UPDATE job_runs
+                    SET owner = %s, status = 'running', attempts = attempts + 1,
+                        started_at = NOW(), finished_at = NULL, duration_ms = NULL,
+                        error = NULL, lease_until = NOW() + INTERVAL %s SECOND
+                    WHERE job_name = %s AND run_key = %s
+                    AND status <> 'succeeded'
+                    AND (
+                        status = 'failed'
+                        OR COALESCE(lease_until, started_at + INTERVAL %s SECOND) < NOW()
+                    )
+                    """,
+                    (OWNER, LEASE_SECONDS, job_name, run_key, LEASE_SECONDS),
+                )
+                claimed = cursor.rowcount == 1
+        db.commit()
+    return claimed
+
+
+def renew_lease(job_name: str, run_key: str) -> bool:
+    """Extends this worker's lease; False if the run was taken over meanwhile."""
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE job_runs SET lease_until = NOW() + INTERVAL %s SECOND
+                WHERE job_name = %s AND run_key = %s AND owner = %s AND status = 'running'
+                """,
+                (LEASE_SECONDS, job_name, run_key, OWNER),
+            )
+            renewed = cursor.rowcount == 1
+        db.commit()
+    return renewed
+
+
+def finish_run(job_name: str, run_key: str, duration_ms: int, error: str = None) -> None:
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            # only the lease holder records the outcome
+            cursor.execute(
+                """
+                UPDATE job_runs
+                SET status = %s, finished_at = NOW(), duration_ms = %s, error = %s,
+                    lease_until = NULL
+                WHERE job_name = %s AND run_key = %s AND owner = %s
+                """,
+                (
+                    "failed" if error else "succeeded",
+                    duration_ms,
+                    error,
+                    job_name,
+                    run_key,
+                    OWNER,
+                ),
+            )
+        db.commit()
+
+
+class LeaseHeartbeat:
+    """Renews a run's lease in the background while the job runs."""
+
+    def __init__(self, job_name: str, run_key: str, interval: float = LEASE_SECONDS / 3):
+        self.job_name = job_name
+        self.run_key = run_key
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"lease-{job_name}", daemon=True
+        )
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if not renew_lease(self.job_name, self.run_key):
+                    print(f"⚠️  Lost the lease on {self.job_name} [{self.run_key}]")
+                    return
+            except pymysql.MySQLError as e:
+                print(f"❌ Could not renew the lease on {self.job_name} [{self.run_key}]: {e}")
+
+
+def run_exclusive(job_name: str, run_key: str, fn) -> str:
+    """
+    Runs `fn` if this process wins the claim for `run_key`.
+    Returns "skipped" if it did not run here, else "succeeded" or "failed".
+    """
+    try:
+        if not claim_run(job_name, run_key):
+            print(f"⏭️  {job_name} [{run_key}] already claimed or done")
+            return "skipped"
+    except pymysql.MySQLError as e:
+        print(f"❌ Could not claim {job_name} [{run_key}]: {e}")
+        return "skipped"
+
+    start = time.monotonic()
+    error = None
+    with LeaseHeartbeat(job_name, run_key):
+        try:
+            fn()
+        except Exception:
+            error = traceback.format_exc()[-2000:]
+            print(f"❌ {job_name} [{run_key}] failed:\n{error}")
+    duration_ms = int((time.monotonic() - start) * 1000)
+    try:
+        finish_run(job_name, run_key, duration_ms, error)
+    except pymysql.MySQLError as e:
+        print(f"❌ Could not record the result of {job_name} [{run_key}]: {e}")
+    return "failed" if error else "succeeded"
+
+
+def job_stats(cursor, limit: int = 20) -> dict:
+    """Per-job timing summary plus the most recent runs."""
+    cursor.execute(
+        """
+        SELECT
+            job_name,
+            COUNT(*) AS runs,
+            SUM(status = 'failed') AS failures,
+            AVG(duration_ms) AS avg_duration_ms,
+            MAX(duration_ms) AS max_duration_ms,
+            MAX(started_at) AS last_started_at
+        FROM job_runs
+        GROUP BY job_name
+        """
+    )
+    jobs = [
+        {
+            "job_name": row["job_name"],
+            "runs": int(row["runs"]),
+            "failures": int(row["failures"] or 0),
+            "avg_duration_ms": (
+                round(float(row["avg_duration_ms"]), 1)
+                if row["avg_duration_ms"] is not None
+                else None
+            ),
+            "max_duration_ms": row["max_duration_ms"],
+            "last_started_at": row["last_started_at"],
+        }
+        for row in cursor.fetchall()
+    ]
+    cursor.execute(
+        """
+        SELECT job_name, run_key, owner, status, attempts, started_at, finished_at, duration_ms
+        FROM job_runs
+        ORDER BY started_at DESC
+        LIMIT %s
+        """,
+        (limit,),
+    )
+    return {"jobs": jobs, "recent_runs": cursor.fetchall()}
+
+
+class JobScheduler:
+    """
+    Per-process cron scheduler whose jobs run on exactly one process.
+
+    Every server worker schedules the same jobs; when a job fires, the
+    workers race to claim the run in job_runs and only the winner executes it.
+    Unless a worker sees the run succeed, it tries the same slot again at each
+    RETRY_MINUTES offset, which picks up failed runs and runs whose worker died.
+    """
+
+    def __init__(self, timezone: str = "Asia/Manila"):
+        self.timezone = ZoneInfo(timezone)
+        self._scheduler = BackgroundScheduler(timezone=timezone)
+
+    def add_daily(self, job_name: str, fn, hour: int, minute: int = 0) -> None:
+        def fire():
+            # key on the scheduled slot, not the wall clock, so a late
+            # misfire on one worker still collides with the others
+            today = datetime.now(self.timezone).date()
+            run_key = f"{today.isoformat()} {hour:02d}:{minute:02d}"
+            self._attempt(job_name, run_key, fn, 0)
+
+        self._scheduler.add_job(
+            fire,
+            "cron",
+            id=job_name,
+            hour=hour,
+            minute=minute,
+            timezone=self.timezone,
+            misfire_grace_time=300,
+            coalesce=True,
+        )
+
+    def _attempt(self, job_name: str, run_key: str, fn, retry: int) -> None:
+        if run_exclusive(job_name, run_key, fn) == "succeeded" or retry >= len(RETRY_MINUTES):
+            return
+        self._scheduler.add_job(
+            self._attempt,
+            "date",
+            args=(job_name, run_key, fn, retry + 1),
+            id=f"{job_name} retry",
+            replace_existing=True,
+            run_date=datetime.now(self.timezone) + timedelta(minutes=RETRY_MINUTES[retry]),
+            misfire_grace_time=300,
+        )
+
+    def start(self) -> None:
+        self._scheduler.start()
+
+    def shutdown(self) -> None:
+        self._scheduler.shutdown(wait=False)
@@ -1,52 +1,95 @@
 from contextlib import asynccontextmanager
+from typing import Optional
 from datetime import datetime, timedelta, date
 from fastapi import (
     FastAPI,
     HTTPException,
+    Query,
 )
-from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from models import (
     Attendance,
+    AttendanceBatchItem,
+    AttendanceBatchPayload,
+    AttendanceStatusPayload,
     BorrowBookPayload,
     RenderBorrowedBook,
     ReturnBookPayload,
     AdminLoginPayload,
 )
-from notif import send_mail
-from database import get_db_connection
-from utils import calculate_return_date, clean_isbn
+from books import (
+    UpstreamError,
+    UpstreamTimeout,
+    books_executor,
+    lookup_book,
+    normalize_isbn,
+    run_books,
+)
+from cache import TTLCache, MISSING
+from database import pool, PoolTimeout, db_executor, run_db
+from jobs import JobScheduler, job_stats
+from migrations import run_migrations
+from outbox import dispatcher, enqueue_mail
+from reminders import run_overdue_notifications
+from utils import calculate_return_date, clean_isbn, encode_cursor, decode_cursor
 
 import jwt
 from zoneinfo import ZoneInfo
 import pymysql
+from pymysql.constants import ER
 import hashlib
+import json
+import os
 import secrets
 
 
 # Define lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Start the scheduler
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
+    # Startup: open the minimum number of pooled connections up front
+    try:
+        pool.warm()
+        with pool.connection() as db:
+            applied = run_migrations(db)
+        if applied:
+            print(f"✅ Applied migrations: {applied}")
+    except (pymysql.MySQLError, RuntimeError) as e:
+        # serving requests against a half-migrated schema only hides the problem
+        print(f"❌ Could not prepare the database: {e}")
+        pool.close()
+        raise
+
+    dispatcher.start()
+
+    # Start the scheduler; every worker schedules the job but only one runs it
+    scheduler = JobScheduler(timezone="Asia/Manila")
+    scheduler.add_daily(
+        "overdue-notifications",
         check_and_notify_overdue_books,
-        'cron',
         hour=8,
-        minute=0,  # For testing
-        timezone='Asia/Manila',
+        minute=0,
     )
     scheduler.start()
 
     yield  # Application runs here
 
-    # Shutdown: Stop the scheduler
+    # Shutdown: Stop the scheduler and close idle connections
     scheduler.shutdown()
+    dispatcher.stop()
+    db_executor.shutdown(wait=False)
+    books_executor.shutdown(wait=False)
+    pool.close()
 
 
 app = FastAPI(lifespan=lifespan)
 
-scheduler = BackgroundScheduler()
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 500
+
+# Ranked /admin/top-attendance first pages; cleared whenever attendance is recorded
+leaderboard_cache = TTLCache(ttl=float(os.getenv("LEADERBOARD_TTL", "30")), maxsize=16)
 
 
 def check_and_notify_overdue_books():
@@ -56,128 +99,14 @@ def check_and_notify_overdue_books():
     print(f"Current time: {datetime.now(ZoneInfo('Asia/Manila'))}")
     print("=" * 60)
 
-    db = None
-    cursor = None
-    try:
-        db = get_db_connection()
-        cursor = db.cursor(pymysql.cursors.DictCursor)
-
-        # Get books that are due tomorrow (reminder)
-        tomorrow = date.today() + timedelta(days=1)
-        print(f"📅 Checking for books due on: {tomorrow}")
-
-        cursor.execute(
-            """
-            SELECT b.*, s.fullname, s.email 
-            FROM borrow b
-            JOIN student s ON b.srcode = s.srcode
-            WHERE b.return_date = %s
-            """,
-            (tomorrow,),
-        )
-        books_due_tomorrow = cursor.fetchall()
-        print(f"📚 Found {len(books_due_tomorrow)} books due tomorrow")
-
-        if books_due_tomorrow:
-            print("Books due tomorrow:")
-            for book in books_due_tomorrow:
-                print(
-                    f"  - {book['bookname']} for {book['fullname']} ({book['email']})"
-                )
-
-        # Get overdue books (1 day past return date)
-        yesterday = date.today() - timedelta(days=1)
-        print(f"📅 Checking for books overdue since: {yesterday}")
-
-        cursor.execute(
-            """
-            SELECT b.*, s.fullname, s.email 
-            FROM borrow b
-            JOIN student s ON b.srcode = s.srcode
-            WHERE b.return_date = %s
-            """,
-            (yesterday,),
-        )
-        overdue_books = cursor.fetchall()
-        print(f"⚠️  Found {len(overdue_books)} overdue books")
-
-        if overdue_books:
-            print("Overdue books:")
-            for book in overdue_books:
-                print(
-                    f"  - {book['bookname']} for {book['fullname']} ({book['email']})"
-                )
-
-        # Send reminder emails for books due tomorrow
-        for book in books_due_tomorrow:
-            print(f"📧 Sending 'due tomorrow' email to: {book['email']}")
-            try:
-                send_mail(
-                    target=book['email'],
-                    subject="📚 Book Due Tomorrow - Reminder",
-                    body=f"""Hi {book['fullname']},
-
-This is a friendly reminder that your borrowed book is due tomorrow.
-
-Book Details:
-- Title: {book['bookname']}
-- Author: {book['bookauthor']}
-- Due Date: {book['return_date']}
-
-Please return the book on time to avoid any penalties.
-
-Thank you,
-Batangas State University Mabini Campus Library
-""",
-                )
-                print(f"✅ Email sent successfully to {book['email']}")
-            except Exception as e:
-                print(f"❌ Failed to send email to {book['email']}: {e}")
-
-        # Send overdue notifications
-        for book in overdue_books:
-            print(f"📧 Sending 'overdue' email to: {book['email']}")
-            try:
-                send_mail(
-                    target=book['email'],
-                    subject="⚠️ Book Overdue - Action Required",
-                    body=f"""Hi {book['fullname']},
-
-Your borrowed book is now overdue.
-
-Book Details:
-- Title: {book['bookname']}
-- Author: {book['bookauthor']}
-- Due Date: {book['return_date']} (OVERDUE)
-
-Please return the book as soon as possible.
-
-Thank you,
-Batangas State University Mabini Campus Library
-""",
-                )
-                print(f"✅ Email sent successfully to {book['email']}")
-            except Exception as e:
-                print(f"❌ Failed to send email to {book['email']}: {e}")
-
-        print("=" * 60)
-        print(f"✅ Notification Check Complete:")
-        print(f"   - Sent {len(books_due_tomorrow)} 'due tomorrow' reminders")
-        print(f"   - Sent {len(overdue_books)} overdue notices")
-        print("=" * 60)
-
-    except pymysql.MySQLError as e:
-        print(f"❌ MySQL error in notification check: {e}")
-    except Exception as e:
-        print(f"❌ Error in notification check: {e}")
-        import traceback
-
-        traceback.print_exc()
-    finally:
-        if cursor:
-            cursor.close()
-        if db:
-            db.close()
+    # errors propagate so the job runner records the run as failed
+    summary = run_overdue_notifications()
+    print(f"✅ Notification Check Complete:")
+    print(f"   - Students with due or overdue books: {summary['students']}")
+    print(f"   - Already notified earlier today: {summary['skipped']}")
+    print(f"   - Sent {summary['sent']} digests, failed {summary['failed']}")
+    print(f"   - SMTP sessions opened: {summary['handshakes']}")
+    print("=" * 60)
 
 
 app.add_middleware(
@@ -187,15 +116,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-scheduler.start()
 
 
-def shutdown_scheduler():
-    scheduler.shutdown()
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 
 @app.post("/attendance")
 async def post_attendance(data: Attendance):
+    return await run_db(_post_attendance, data)
+
+
+def _post_attendance(data: Attendance):
     if not data.token or data.hours <= 0:
         raise HTTPException(status_code=400, detail="Missing or invalid fields")
 
@@ -218,45 +151,51 @@ async def post_attendance(data: Attendance):
         timezone = ZoneInfo("Asia/Manila")
         now = datetime.now(timezone)
         timeout = now + timedelta(hours=data.hours)
-        today = now.date()
 
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor()
 
-        # Check if student exists
-        cursor.execute("SELECT * FROM student WHERE srcode = %s", (srcode,))
-        student = cursor.fetchone()
-        # if th student doesn't exist, create a new one
-        if not student and type_.lower() == "student":
+        # Insert attendance; the unique (srcode, attend_date) key rejects a
+        # second check-in on the same day, even from two simultaneous scans
+        try:
             cursor.execute(
-                "INSERT INTO student (srcode, fullname,email,  type, attendance_count) VALUES (%s, %s, %s, %s, %s)",
-                (srcode, fullname, email, type_, 0),
+                "INSERT INTO attendance (srcode, time_in, time_out) VALUES (%s, %s, %s)",
+                (srcode, now, timeout),
             )
-
-        cursor.execute(
-            "SELECT id FROM attendance WHERE srcode = %s AND DATE(time_in) = %s",
-            (srcode, today),
-        )
-        existing_attendance = cursor.fetchone()
-
-        if existing_attendance:
+        except pymysql.IntegrityError as e:
+            if e.args[0] != ER.DUP_ENTRY:
+                raise
+            db.rollback()
             raise HTTPException(
                 status_code=409, detail="Attendance already recorded for today"
             )
 
-        # Insert attendance
-        cursor.execute(
-            "INSERT INTO attendance (srcode, time_in, time_out) VALUES (%s, %s, %s)",
-            (srcode, now, timeout),
-        )
-
-        # Increment attendance count
-        cursor.execute(
-            "UPDATE student SET attendance_count = attendance_count + 1 WHERE srcode = %s",
-            (srcode,),
-        )
+        # Create the student on first check-in or increment attendance count
+        if type_.lower() == "student":
+            cursor.execute(
+                """
+                INSERT INTO student (srcode, fullname, email, type, attendance_count)
+                VALUES (%s, %s, %s, %s, 1)
+                ON DUPLICATE KEY UPDATE attendance_count = attendance_count + 1
+                """,
+                (srcode, fullname, email, type_),
+            )
+            cursor.execute(
+                """
+                INSERT INTO student_hours (srcode, fullname, total_hours)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE total_hours = total_hours + VALUES(total_hours)
+                """,
+                (srcode, fullname, data.hours),
+            )
+        else:
+            cursor.execute(
+                "UPDATE student SET attendance_count = attendance_count + 1 WHERE srcode = %s",
+                (srcode,),
+            )
 
         db.commit()
+        leaderboard_cache.clear()
         return {"message": f"Attendance recorded successfully for {fullname}."}
 
     except pymysql.MySQLError as e:
@@ -274,12 +213,227 @@ async def post_attendance(data: Attendance):
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
+
+
+# Whether the token's owner has already checked in today; the kiosk
+# prefetches this as soon as a QR code is scanned
+@app.post("/attendance/status")
+async def post_attendance_status(data: AttendanceStatusPayload):
+    return await run_db(_post_attendance_status, data)
+
+
+def _post_attendance_status(data: AttendanceStatusPayload):
+    if not data.token:
+        raise HTTPException(status_code=400, detail="Missing token.")
+
+    db = None
+    cursor = None
+    try:
+        payload = jwt.decode(data.token, options={"verify_signature": False})
+        srcode = payload.get("srcode")
+        if not srcode:
+            raise HTTPException(
+                status_code=400, detail="Malformed token: missing srcode"
+            )
+
+        today = datetime.now(ZoneInfo("Asia/Manila")).date()
+        db = pool.acquire()
+        cursor = db.cursor(pymysql.cursors.DictCursor)
+        # served by the unique (srcode, attend_date) key
+        cursor.execute(
+            """
+            SELECT
+                DATE_FORMAT(time_in, '%%Y-%%m-%%d %%H:%%i:%%s') AS time_in,
+                DATE_FORMAT(time_out, '%%Y-%%m-%%d %%H:%%i:%%s') AS time_out
+            FROM attendance
+            WHERE srcode = %s AND attend_date = %s
+            """,
+            (srcode, today),
+        )
+        record = cursor.fetchone()
+        if not record:
+            return {"checked_in": False}
+        return {"checked_in": True, **record}
+
+    except pymysql.MySQLError as e:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
+
+    finally:
+        if cursor:
+            cursor.close()
+        if db:
+            pool.release(db)
+
+
+# Replay of buffered kiosk scans
+@app.post("/attendance/batch")
+async def post_attendance_batch(data: AttendanceBatchPayload):
+    return await run_db(_post_attendance_batch, data)
+
+
+def _validate_batch_item(item: AttendanceBatchItem, now: datetime) -> dict:
+    """Returns the row to insert for a scan, or raises ValueError."""
+    if not item.token or item.hours <= 0:
+        raise ValueError("Missing or invalid fields")
+    try:
+        payload = jwt.decode(item.token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        raise ValueError("Invalid token")
+    srcode = payload.get("srcode")
+    if not srcode:
+        raise ValueError("Malformed token: missing srcode")
+
+    time_in = item.scanned_at or now
+    if time_in.tzinfo is None:
+        time_in = time_in.replace(tzinfo=now.tzinfo)
+    time_in = time_in.astimezone(now.tzinfo)
+    if time_in > now + timedelta(minutes=5):
+        raise ValueError("Scan time is in the future")
+
+    return {
+        "srcode": str(srcode),
+        "fullname": payload.get("fullname", ""),
+        "type": payload.get("type", "student"),
+        "hours": item.hours,
+        "time_in": time_in,
+        "time_out": time_in + timedelta(hours=item.hours),
+        "day": time_in.date(),
+    }
+
+
+def _post_attendance_batch(data: AttendanceBatchPayload):
+    if len(data.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_SIZE} items per batch"
+        )
+
+    now = datetime.now(ZoneInfo("Asia/Manila"))
+    results = [None] * len(data.items)
+    candidates = {}  # (srcode, day) -> (index, row); the first scan of a day wins
+    for index, item in enumerate(data.items):
+        try:
+            row = _validate_batch_item(item, now)
+        except ValueError as e:
+            results[index] = {"index": index, "status": "invalid", "detail": str(e)}
+            continue
+        key = (row["srcode"], row["day"])
+        if key in candidates:
+            results[index] = {"index": index, "status": "duplicate"}
+            continue
+        candidates[key] = (index, row)
+
+    db = None
+    cursor = None
+    try:
+        db = pool.acquire()
+        cursor = db.cursor()
+
+        # a concurrent single scan can still win the unique key between the
+        # existence check and the insert; start over once if that happens
+        for attempt in range(2):
+            pending = dict(candidates)
+            if pending:
+                srcodes = sorted({srcode for srcode, _ in pending})
+                days = sorted({day for _, day in pending})
+                cursor.execute(
+                    f"""
+                    SELECT srcode, attend_date FROM attendance
+                    WHERE srcode IN ({", ".join(["%s"] * len(srcodes))})
+                    AND attend_date IN ({", ".join(["%s"] * len(days))})
+                    """,
+                    (*srcodes, *days),
+                )
+                for existing in cursor.fetchall():
+                    pending.pop((existing["srcode"], existing["attend_date"]), None)
+
+            rows = [row for _, row in pending.values()]
+            try:
+                _insert_attendance_rows(cursor, rows)
+            except pymysql.IntegrityError as e:
+                if e.args[0] != ER.DUP_ENTRY or attempt:
+                    raise
+                db.rollback()
+                continue
+            break
+
+        db.commit()
+        if rows:
+            leaderboard_cache.clear()
+
+    except pymysql.MySQLError as e:
+        if db:
+            db.rollback()
+        raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
+
+    finally:
+        if cursor:
+            cursor.close()
+        if db:
+            pool.release(db)
+
+    for key, (index, _) in candidates.items():
+        status = "created" if key in pending else "duplicate"
+        results[index] = {"index": index, "status": status}
+
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"results": results, **counts}
+
+
+def _insert_attendance_rows(cursor, rows: list) -> None:
+    if not rows:
+        return
+    cursor.executemany(
+        "INSERT INTO attendance (srcode, time_in, time_out) VALUES (%s, %s, %s)",
+        [(row["srcode"], row["time_in"], row["time_out"]) for row in rows],
+    )
+
+    # one counter update per student, however many days they appear in
+    students, others = {}, {}
+    for row in rows:
+        target = students if row["type"].lower() == "student" else others
+        entry = target.setdefault(
+            row["srcode"], {"fullname": row["fullname"], "type": row["type"], "count": 0, "hours": 0}
+        )
+        entry["count"] += 1
+        entry["hours"] += row["hours"]
+
+    if students:
+        cursor.executemany(
+            """
+            INSERT INTO student (srcode, fullname, email, type, attendance_count)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE attendance_count = attendance_count + VALUES(attendance_count)
+            """,
+            [
+                (srcode, s["fullname"], f"{srcode}@g.batstate-u.edu.ph", s["type"], s["count"])
+                for srcode, s in students.items()
+            ],
+        )
+        cursor.executemany(
+            """
+            INSERT INTO student_hours (srcode, fullname, total_hours)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE total_hours = total_hours + VALUES(total_hours)
+            """,
+            [(srcode, s["fullname"], s["hours"]) for srcode, s in students.items()],
+        )
+    if others:
+        cursor.executemany(
+            "UPDATE student SET attendance_count = attendance_count + %s WHERE srcode = %s",
+            [(s["count"], srcode) for srcode, s in others.items()],
+        )
 
 
 # for borrow book
 @app.post("/borrow")
 async def post_borrow(data: BorrowBookPayload):
+    return await run_db(_post_borrow, data)
+
+
+def _post_borrow(data: BorrowBookPayload):
     # validate the incoming data
     if not data.token or not data.isbn or not data.bookname or not data.bookauthor:
         raise HTTPException(status_code=400, detail="Missing or invalid fields")
@@ -304,7 +458,7 @@ async def post_borrow(data: BorrowBookPayload):
             )
 
         # connect to the database
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor()
         db.begin()  # start transaction
 
@@ -375,13 +529,29 @@ async def post_borrow(data: BorrowBookPayload):
                 return_date,
             ),
         )
-        db.commit()  # commit transaction
-        # after conmmiting the transaction, send an email notification
-        send_mail(
+        # queue the confirmation email in the same transaction; the outbox
+        # dispatcher sends it in the background once the borrow is committed
+        enqueue_mail(
+            cursor,
             email,
             subject="Borrowed Book Notification",
-            body="",
+            body=f"""Hi {fullname},
+
+You have borrowed a book from the library.
+
+Book Details:
+- Title: {data.bookname}
+- Author: {data.bookauthor}
+- Due Date: {return_date}
+
+Please return the book on time to avoid any penalties.
+
+Thank you,
+Batangas State University Mabini Campus Library
+""",
         )
+        db.commit()  # commit transaction
+        dispatcher.wake()
         return {"message": f"{fullname} borrowed '{data.bookname}' successfully."}
 
     except pymysql.MySQLError as e:
@@ -393,12 +563,16 @@ async def post_borrow(data: BorrowBookPayload):
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
 
 
 # render for borrowed books
 @app.post("/borrowed")
 async def get_borrowed_books(data: RenderBorrowedBook):
+    return await run_db(_get_borrowed_books, data)
+
+
+def _get_borrowed_books(data: RenderBorrowedBook):
     # GET THE data
     token = data.token
     if not token:
@@ -416,7 +590,7 @@ async def get_borrowed_books(data: RenderBorrowedBook):
                 status_code=400, detail="Malformed token: missing srcode"
             )
 
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor(pymysql.cursors.DictCursor)
 
         # Fetch only this student's borrowed book
@@ -441,12 +615,16 @@ async def get_borrowed_books(data: RenderBorrowedBook):
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
 
 
 # return book
 @app.post("/returnbook")
 async def delete_borrow_book(data: ReturnBookPayload):
+    return await run_db(_delete_borrow_book, data)
+
+
+def _delete_borrow_book(data: ReturnBookPayload):
     token = data.token
     isbn = clean_isbn(data.isbn)
 
@@ -467,7 +645,7 @@ async def delete_borrow_book(data: ReturnBookPayload):
                 status_code=400, detail="Malformed token: missing srcode"
             )
 
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor()
         db.begin()
 
@@ -505,47 +683,25 @@ async def delete_borrow_book(data: ReturnBookPayload):
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
 
 
 # Admin login endpoint
 @app.post("/admin/login")
 async def admin_login(data: AdminLoginPayload):
+    return await run_db(_admin_login, data)
+
+
+def _admin_login(data: AdminLoginPayload):
     if not data.username or not data.password:
         raise HTTPException(status_code=400, detail="Missing username or password")
 
     db = None
     cursor = None
     try:
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor(pymysql.cursors.DictCursor)
 
-        # Check if admin table exists, if not create it with default admin
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS admin (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-        db.commit()
-
-        # Check if any admin exists
-        cursor.execute("SELECT COUNT(*) as count FROM admin")
-        admin_count = cursor.fetchone()["count"]
-
-        # If no admin exists at all, create default admin (username: admin, password: admin123)
-        if admin_count == 0:
-            default_password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-            cursor.execute(
-                "INSERT INTO admin (username, password_hash) VALUES (%s, %s)",
-                ("admin", default_password_hash),
-            )
-            db.commit()
-
         # Check if the provided username exists
         cursor.execute("SELECT * FROM admin WHERE username = %s", (data.username,))
         admin = cursor.fetchone()
@@ -576,50 +732,29 @@ async def admin_login(data: AdminLoginPayload):
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
 
 
-# Get top attendance (ranked by total hours)
-@app.get("/admin/top-attendance")
-async def get_top_attendance():
+# Shared plumbing for the paginated /admin list endpoints. Pages are keyset
+# based: the opaque cursor holds the sort key of the last row returned, and
+# the next page starts strictly after it, so deep pages cost the same as the
+# first one. With stream=true the rows are written as NDJSON straight from a
+# server-side cursor instead.
+def _fetch_page(sql: str, params: tuple, limit: int, cursor_key, format_row) -> tuple:
     db = None
     cursor = None
     try:
-        db = get_db_connection()
+        db = pool.acquire()
         cursor = db.cursor(pymysql.cursors.DictCursor)
+        # read one extra row to know whether another page exists
+        cursor.execute(sql + " LIMIT %s", params + (limit + 1,))
+        rows = cursor.fetchall()
 
-        # Calculate total hours for each student
-        # Total hours = SUM of TIMESTAMPDIFF(HOUR, time_in, time_out) from attendance table
-        cursor.execute(
-            """
-            SELECT 
-                s.srcode,
-                s.fullname as name,
-                COALESCE(SUM(TIMESTAMPDIFF(HOUR, a.time_in, a.time_out)), 0) as total_hours
-            FROM student s
-            LEFT JOIN attendance a ON s.srcode = a.srcode
-            WHERE s.type = 'student'
-            GROUP BY s.srcode, s.fullname
-            ORDER BY total_hours DESC
-            LIMIT 100
-        """
-        )
-
-        students = cursor.fetchall()
-
-        # Format the response
-        result = []
-        for student in students:
-            result.append(
-                {
-                    "name": student["name"] or "Unknown",
-                    "total_hours": (
-                        int(student["total_hours"]) if student["total_hours"] else 0
-                    ),
-                }
-            )
-
-        return {"students": result}
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(cursor_key(rows[-1]))
+        return [format_row(row) for row in rows], next_cursor
 
     except pymysql.MySQLError as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
@@ -628,107 +763,242 @@ async def get_top_attendance():
         if cursor:
             cursor.close()
         if db:
-            db.close()
+            pool.release(db)
 
 
-# Get most borrowed books (ranked by book_count)
-@app.get("/admin/most-borrowed-books")
-async def get_most_borrowed_books():
-    db = None
+def _stream_ndjson(sql: str, params: tuple, format_row):
+    db = pool.acquire()
     cursor = None
+    failed = False
     try:
-        db = get_db_connection()
-        cursor = db.cursor(pymysql.cursors.DictCursor)
+        cursor = db.cursor(pymysql.cursors.SSDictCursor)
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield json.dumps(format_row(row)) + "\n"
+    except Exception:
+        failed = True
+        raise
+    finally:
+        if cursor and not failed:
+            cursor.close()
+        pool.release(db, discard=failed)
 
-        # Get students ranked by book_count
-        cursor.execute(
-            """
-            SELECT 
-                srcode,
-                fullname as name,
-                COALESCE(book_count, 0) as books_borrowed
-            FROM student
-            WHERE type = 'student'
-            ORDER BY books_borrowed DESC
-            LIMIT 100
-        """
+
+def _list_response(key: str, sql: str, params: tuple, limit: int, stream: bool, cursor_key, format_row):
+    if stream:
+        return StreamingResponse(
+            _stream_ndjson(sql, params, format_row),
+            media_type="application/x-ndjson",
         )
+    rows, next_cursor = _fetch_page(sql, params, limit, cursor_key, format_row)
+    return {key: rows, "next_cursor": next_cursor}
 
-        students = cursor.fetchall()
-
-        # Format the response
-        result = []
-        for student in students:
-            result.append(
-                {
-                    "name": student["name"] or "Unknown",
-                    "books_borrowed": (
-                        int(student["books_borrowed"])
-                        if student["books_borrowed"]
-                        else 0
-                    ),
-                }
-            )
 
-        return {"students": result}
+def _after(cursor: Optional[str], size: int) -> Optional[list]:
+    if cursor is None:
+        return None
+    try:
+        values = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _format_top_attendance(student: dict) -> dict:
+    return {
+        "name": student["name"] or "Unknown",
+        "total_hours": int(student["total_hours"]) if student["total_hours"] else 0,
+    }
+
+
+def _top_attendance_query(after: Optional[list]) -> tuple:
+    # Total hours are kept up to date in student_hours by post_attendance,
+    # so ranking walks the (total_hours, srcode) index from the top
+    where, params = "", ()
+    if after:
+        where = "WHERE total_hours < %s OR (total_hours = %s AND srcode < %s)"
+        params = (after[0], after[0], after[1])
+    sql = f"""
+        SELECT srcode, fullname as name, total_hours
+        FROM student_hours
+        {where}
+        ORDER BY total_hours DESC, srcode DESC
+    """
+    return sql, params
 
-    except pymysql.MySQLError as e:
-        raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
 
-    finally:
-        if cursor:
-            cursor.close()
-        if db:
-            db.close()
+# Get top attendance (ranked by total hours)
+@app.get("/admin/top-attendance")
+async def get_top_attendance(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+):
+    after = _after(cursor, 2)
+    if after is None and not stream:
+        cached = leaderboard_cache.get(("top", limit))
+        if cached is not MISSING:
+            return cached
+
+    sql, params = _top_attendance_query(after)
+    response = await run_db(
+        _list_response,
+        "students",
+        sql,
+        params,
+        limit,
+        stream,
+        lambda row: [row["total_hours"], row["srcode"]],
+        _format_top_attendance,
+    )
+    if after is None and not stream:
+        leaderboard_cache.set(("top", limit), response)
+    return response
+
+
+def _format_most_borrowed(student: dict) -> dict:
+    return {
+        "name": student["name"] or "Unknown",
+        "books_borrowed": (
+            int(student["books_borrowed"]) if student["books_borrowed"] else 0
+        ),
+    }
+
+
+# Get most borrowed books (ranked by book_count)
+@app.get("/admin/most-borrowed-books")
+async def get_most_borrowed_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+):
+    after = _after(cursor, 2)
+    where, params = "", ()
+    # book_count is NOT NULL (migration 10), so this walks idx_student_type_books
+    if after:
+        where = "AND (book_count < %s OR (book_count = %s AND srcode < %s))"
+        params = (after[0], after[0], after[1])
+    # Get students ranked by book_count
+    sql = f"""
+        SELECT 
+            srcode,
+            fullname as name,
+            book_count as books_borrowed
+        FROM student
+        WHERE type = 'student' {where}
+        ORDER BY book_count DESC, srcode DESC
+    """
+    return await run_db(
+        _list_response,
+        "students",
+        sql,
+        params,
+        limit,
+        stream,
+        lambda row: [row["books_borrowed"], row["srcode"]],
+        _format_most_borrowed,
+    )
+
+
+def _format_today_attendance(record: dict) -> dict:
+    return {
+        "name": record["name"] or "Unknown",
+        "hours": int(record["hours"]) if record["hours"] else 0,
+        "time": record["time"] or "N/A",
+    }
 
 
 # Get today's attendance
 @app.get("/admin/today-attendance")
-async def get_today_attendance():
-    db = None
-    cursor = None
-    try:
-        timezone = ZoneInfo("Asia/Manila")
-        today = datetime.now(timezone).date()
+async def get_today_attendance(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+):
+    timezone = ZoneInfo("Asia/Manila")
+    today = datetime.now(timezone).date()
+
+    after = _after(cursor, 2)
+    where, params = "", (today,)
+    if after:
+        where = "AND (a.time_in < %s OR (a.time_in = %s AND a.id < %s))"
+        params += (after[0], after[0], after[1])
+    # Get today's attendance records, newest first
+    sql = f"""
+        SELECT 
+            a.id,
+            s.fullname as name,
+            TIMESTAMPDIFF(HOUR, a.time_in, a.time_out) as hours,
+            DATE_FORMAT(a.time_in, '%%Y-%%m-%%d %%H:%%i:%%s') as time
+        FROM attendance a
+        JOIN student s ON a.srcode = s.srcode
+        WHERE a.attend_date = %s {where}
+        ORDER BY a.time_in DESC, a.id DESC
+    """
+    return await run_db(
+        _list_response,
+        "attendance",
+        sql,
+        params,
+        limit,
+        stream,
+        lambda row: [row["time"], row["id"]],
+        _format_today_attendance,
+    )
 
-        db = get_db_connection()
-        cursor = db.cursor(pymysql.cursors.DictCursor)
 
-        # Get today's attendance records
-        cursor.execute(
-            """
-            SELECT 
-                s.fullname as name,
-                TIMESTAMPDIFF(HOUR, a.time_in, a.time_out) as hours,
-                DATE_FORMAT(a.time_in, '%%Y-%%m-%%d %%H:%%i:%%s') as time
-            FROM attendance a
-            JOIN student s ON a.srcode = s.srcode
-            WHERE DATE(a.time_in) = %s
-            ORDER BY a.time_in DESC
-        """,
-            (today,),
-        )
+# Shared book metadata lookup for the kiosks
+@app.get("/books/{isbn}")
+async def get_book(isbn: str):
+    return await run_books(_get_book, isbn)
 
-        records = cursor.fetchall()
-
-        # Format the response
-        result = []
-        for record in records:
-            result.append(
-                {
-                    "name": record["name"] or "Unknown",
-                    "hours": int(record["hours"]) if record["hours"] else 0,
-                    "time": record["time"] or "N/A",
-                }
-            )
 
-        return {"attendance": result}
+def _get_book(isbn: str):
+    try:
+        isbn13 = normalize_isbn(isbn)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        book = lookup_book(isbn13)
+    except UpstreamTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamError as e:
+        # the kiosk doesn't retry 503/504 for /books; after a 503 it asks
+        # Google Books itself, after a 504 it gives up
+        raise HTTPException(status_code=503, detail=str(e))
     except pymysql.MySQLError as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
 
-    finally:
-        if cursor:
-            cursor.close()
-        if db:
-            db.close()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found.")
+    return book
+
+
+# Liveness check; kiosks call it at startup to open a connection early
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+# Connection pool metrics
+@app.get("/admin/pool-stats")
+async def get_pool_stats():
+    return pool.stats()
+
+
+# Scheduled job history and timings
+@app.get("/admin/jobs")
+async def get_jobs():
+    return await run_db(_get_jobs)
+
+
+def _get_jobs():
+    try:
+        with pool.connection() as db:
+            with db.cursor() as cursor:
+                return job_stats(cursor)
+    except pymysql.MySQLError as e:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
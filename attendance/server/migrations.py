@@ -0,0 +1,324 @@
+import hashlib
+from dataclasses import dataclass
+
+
+MIGRATION_LOCK = "library_schema_migrations"
+
+# default admin account (username: admin, password: admin123)
+DEFAULT_ADMIN_HASH = hashlib.sha256("admin123".encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    # SQL strings, or callables taking a cursor for steps that need to look
+    # at the schema first
+    statements: tuple
+
+
+# MySQL commits DDL implicitly, so a migration that fails halfway leaves its
+# earlier ALTERs applied but the version unrecorded. Steps built with these
+# helpers check information_schema first and can safely run again.
+def _column_exists(cursor, table: str, column: str) -> bool:
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column),
+    )
+    return cursor.fetchone() is not None
+
+
+def _index_exists(cursor, table: str, index: str) -> bool:
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, index),
+    )
+    return cursor.fetchone() is not None
+
+
+def add_column(table: str, column: str, definition: str):
+    def step(cursor):
+        if not _column_exists(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    return step
+
+
+def add_index(table: str, index: str, columns: str, unique: bool = False):
+    def step(cursor):
+        if not _index_exists(cursor, table, index):
+            kind = "UNIQUE KEY" if unique else "KEY"
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {index} ({columns})")
+
+    return step
+
+
+# Append new migrations at the end; never edit one that has already shipped.
+# Pending migrations run in version order, so version 0 creates the base
+# tables on a fresh database before anything alters them.
+MIGRATIONS = [
+    Migration(
+        0,
+        "base library tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS student (
+                srcode VARCHAR(64) NOT NULL PRIMARY KEY,
+                fullname VARCHAR(255) NOT NULL DEFAULT '',
+                email VARCHAR(255) NULL,
+                type VARCHAR(32) NOT NULL DEFAULT 'student',
+                attendance_count INT NOT NULL DEFAULT 0,
+                book_count INT NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS attendance (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                srcode VARCHAR(64) NOT NULL,
+                time_in DATETIME NOT NULL,
+                time_out DATETIME NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS books (
+                isbn VARCHAR(20) NOT NULL PRIMARY KEY,
+                bookname VARCHAR(255) NOT NULL,
+                bookauthor VARCHAR(255) NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS borrow (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                srcode VARCHAR(64) NOT NULL,
+                email VARCHAR(255) NULL,
+                isbn VARCHAR(20) NOT NULL,
+                bookname VARCHAR(255) NOT NULL,
+                bookauthor VARCHAR(255) NOT NULL,
+                borrow_date DATE NOT NULL,
+                return_date DATE NOT NULL,
+                CONSTRAINT fk_borrow_student FOREIGN KEY (srcode) REFERENCES student (srcode),
+                CONSTRAINT fk_borrow_book FOREIGN KEY (isbn) REFERENCES books (isbn)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS admin (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            f"""
+            INSERT INTO admin (username, password_hash)
+            SELECT 'admin', '{DEFAULT_ADMIN_HASH}' FROM DUAL
+            WHERE NOT EXISTS (SELECT 1 FROM admin)
+            """,
+        ),
+    ),
+    Migration(
+        1,
+        "mail outbox for background email delivery",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS mail_outbox (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                recipient VARCHAR(255) NOT NULL,
+                subject VARCHAR(255) NOT NULL,
+                body TEXT NOT NULL,
+                status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+                attempts INT NOT NULL DEFAULT 0,
+                next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                claim_token CHAR(32) NULL,
+                locked_until DATETIME NULL,
+                last_error TEXT NULL,
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                sent_at DATETIME NULL,
+                KEY idx_mail_outbox_due (status, next_attempt_at),
+                KEY idx_mail_outbox_claim (claim_token)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "notification log for resumable reminder runs",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS notification_log (
+                run_date DATE NOT NULL,
+                srcode VARCHAR(64) NOT NULL,
+                email VARCHAR(255) NOT NULL,
+                book_count INT NOT NULL DEFAULT 0,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_date, srcode)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        3,
+        "job run history used to run cron jobs on one worker only",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS job_runs (
+                job_name VARCHAR(100) NOT NULL,
+                run_key VARCHAR(100) NOT NULL,
+                owner VARCHAR(255) NOT NULL,
+                status ENUM('running', 'succeeded', 'failed') NOT NULL,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP NULL,
+                duration_ms INT NULL,
+                error TEXT NULL,
+                PRIMARY KEY (job_name, run_key),
+                KEY idx_job_runs_started (started_at)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        4,
+        "one attendance row per student per day",
+        (
+            add_column("attendance", "attend_date", "DATE AS (DATE(time_in)) STORED"),
+            # Check-ins that raced past the old SELECT-then-INSERT would make
+            # the unique key fail; keep each student's first row of the day.
+            """
+            DELETE later FROM attendance later
+            JOIN attendance earlier
+                ON earlier.srcode = later.srcode
+                AND earlier.attend_date = later.attend_date
+                AND earlier.id < later.id
+            """,
+            add_index("attendance", "uq_attendance_srcode_day", "srcode, attend_date", unique=True),
+        ),
+    ),
+    Migration(
+        5,
+        "index for listing a day's attendance by time",
+        (
+            # (srcode, attend_date) is already covered by uq_attendance_srcode_day
+            add_index("attendance", "idx_attendance_day_time", "attend_date, time_in"),
+        ),
+    ),
+    Migration(
+        6,
+        "indexes for the borrow lookups",
+        (
+            # attendance.srcode is served by uq_attendance_srcode_day
+            add_index("borrow", "idx_borrow_isbn_return", "isbn, return_date"),
+            add_index("borrow", "idx_borrow_srcode_isbn", "srcode, isbn"),
+            add_index("borrow", "idx_borrow_return_date", "return_date"),
+        ),
+    ),
+    Migration(
+        7,
+        "maintained per-student attendance hours for the leaderboard",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS student_hours (
+                srcode VARCHAR(64) NOT NULL PRIMARY KEY,
+                fullname VARCHAR(255) NOT NULL DEFAULT '',
+                total_hours INT NOT NULL DEFAULT 0,
+                KEY idx_student_hours_rank (total_hours, srcode)
+            )
+            """,
+            """
+            INSERT INTO student_hours (srcode, fullname, total_hours)
+            SELECT
+                s.srcode,
+                s.fullname,
+                COALESCE(SUM(TIMESTAMPDIFF(HOUR, a.time_in, a.time_out)), 0)
+            FROM student s
+            LEFT JOIN attendance a ON s.srcode = a.srcode
+            WHERE s.type = 'student'
+            GROUP BY s.srcode, s.fullname
+            ON DUPLICATE KEY UPDATE total_hours = VALUES(total_hours)
+            """,
+        ),
+    ),
+    Migration(
+        8,
+        "index for paging students by books borrowed",
+        (
+            add_index("student", "idx_student_type_books", "type, book_count, srcode"),
+        ),
+    ),
+    Migration(
+        9,
+        "cover image for the shared book metadata service",
+        (
+            add_column("books", "thumbnail_url", "VARCHAR(512) NULL"),
+        ),
+    ),
+    Migration(
+        10,
+        "book_count is never NULL, so most-borrowed paging can use its index",
+        (
+            # databases created before migration 0 may have NULL counts
+            "UPDATE student SET book_count = 0 WHERE book_count IS NULL",
+            "ALTER TABLE student MODIFY COLUMN book_count INT NOT NULL DEFAULT 0",
+        ),
+    ),
+    Migration(
+        11,
+        "leases and attempt counts so failed or abandoned job runs are retried",
+        (
+            add_column("job_runs", "lease_until", "DATETIME NULL"),
+            add_column("job_runs", "attempts", "INT NOT NULL DEFAULT 1"),
+        ),
+    ),
+]
+
+
+def run_migrations(db, lock_timeout: int = 60) -> list:
+    """
+    Applies every migration that is not yet recorded in schema_migrations.
+    A named MySQL lock keeps several server workers starting at once from
+    applying the same migration twice. Returns the versions that were applied.
+    """
+    cursor = db.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (MIGRATION_LOCK, lock_timeout))
+        if not cursor.fetchone()["locked"]:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row["version"] for row in cursor.fetchall()}
+
+            ran = []
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in applied:
+                    continue
+                print(f"🛠️  Applying migration {migration.version}: {migration.description}")
+                for statement in migration.statements:
+                    if callable(statement):
+                        statement(cursor)
+                    else:
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (migration.version, migration.description),
+                )
+                db.commit()
+                ran.append(migration.version)
+            return ran
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+    finally:
+        cursor.close()
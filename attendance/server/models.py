@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -7,6 +10,15 @@ class Attendance(BaseModel):
     hours: int
 
 
+# A buffered scan replayed by a kiosk, stamped with when it was scanned
+class AttendanceBatchItem(Attendance):
+    scanned_at: Optional[datetime] = None
+
+
+class AttendanceBatchPayload(BaseModel):
+    items: List[AttendanceBatchItem]
+
+
 class BorrowBookPayload(BaseModel):
     token: str
     isbn: str
@@ -24,6 +36,10 @@ class RenderBorrowedBook(BaseModel):
     token: str
 
 
+class AttendanceStatusPayload(BaseModel):
+    token: str
+
+
 class AdminLoginPayload(BaseModel):
     username: str
     password: str
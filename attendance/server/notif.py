@@ -1,7 +1,11 @@
+from dataclasses import dataclass
 from dotenv import load_dotenv
 import os
 import smtplib
 from email.message import EmailMessage
+from typing import Iterable, Optional, Tuple
+
+from utils import RateLimiter
 
 # Load environment variables
 load_dotenv()
@@ -9,34 +13,171 @@ load_dotenv()
 EMAIL = os.getenv("EMAIL")
 PASSWORD = os.getenv("PASSWORD")
 
+# SMTP server settings. For offline testing point these at a local stand-in,
+# e.g. `python -m aiosmtpd -n -l localhost:8025` with
+# SMTP_HOST=localhost SMTP_PORT=8025 SMTP_STARTTLS=0 SMTP_LOGIN=0
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_LOGIN = os.getenv("SMTP_LOGIN", "1") == "1"
+# Gmail drops sessions that send too much; reconnect after this many messages
+SMTP_MAX_PER_SESSION = int(os.getenv("SMTP_MAX_PER_SESSION", "80"))
+SMTP_RATE_PER_SECOND = float(os.getenv("SMTP_RATE_PER_SECOND", "5"))
+
 # Validate environment variables
 if not EMAIL or not PASSWORD:
     raise ValueError("EMAIL and PASSWORD must be set in your .env file")
 
 
-def send_mail(
-    target: str,
-    subject: str = "Borrowed Book Notification",
-    body: str = "You have borrowed a book. Please return it on time.",
-) -> None:
-    """
-    Sends an email to the target address with the given subject and body.
-    """
-    if not EMAIL or not PASSWORD:
-        raise ValueError("EMAIL and PASSWORD must be set in your .env file")
+def build_message(target: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = EMAIL
     msg["To"] = target
     msg.set_content(body)
+    return msg
 
-    # Use 'with' to ensure connection is properly closed
+
+def _open_session() -> smtplib.SMTP:
+    if not EMAIL or not PASSWORD:
+        raise ValueError("EMAIL and PASSWORD must be set in your .env file")
+    mail = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
     try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as mail:
-            mail.ehlo()
+        mail.ehlo()
+        if SMTP_STARTTLS:
             mail.starttls()
+            mail.ehlo()
+        if SMTP_LOGIN:
             mail.login(EMAIL, PASSWORD)
-            mail.send_message(msg)
+    except Exception:
+        mail.close()
+        raise
+    return mail
+
+
+@dataclass
+class SendResult:
+    target: str
+    ok: bool
+    error: Optional[str] = None
+
+
+class BatchMailer:
+    """
+    Sends many emails over one authenticated SMTP session.
+
+    The session is opened lazily, replaced after `max_per_session` messages,
+    and re-established once if the server drops it mid-batch. Sends are
+    throttled to `rate_per_second`. Use it as a context manager so the
+    session is closed when the batch is done.
+    """
+
+    def __init__(
+        self,
+        max_per_session: int = SMTP_MAX_PER_SESSION,
+        rate_per_second: float = SMTP_RATE_PER_SECOND,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.max_per_session = max_per_session
+        # pass a shared limiter to cap the rate across several mailers
+        self.limiter = limiter or RateLimiter(rate_per_second)
+        self.handshakes = 0
+        self._session: Optional[smtplib.SMTP] = None
+        self._sent_in_session = 0
+
+    def __enter__(self) -> "BatchMailer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._session is not None:
+            try:
+                self._session.quit()
+            except (smtplib.SMTPException, OSError):
+                self._session.close()
+            self._session = None
+            self._sent_in_session = 0
+
+    def _ensure_session(self) -> smtplib.SMTP:
+        if self._session is not None and self._sent_in_session >= self.max_per_session:
+            self.close()
+        if self._session is None:
+            self._session = _open_session()
+            self.handshakes += 1
+            self._sent_in_session = 0
+        return self._session
+
+    def send(self, target: str, subject: str, body: str) -> None:
+        """
+        Sends one message, reconnecting once if the session was lost.
+        Raises the SMTP error if the message still cannot be sent.
+        """
+        msg = build_message(target, subject, body)
+        for attempt in range(2):
+            # the retry is a real send too, so it waits its turn as well
+            self.limiter.wait()
+            session = self._ensure_session()
+            try:
+                session.send_message(msg)
+                self._sent_in_session += 1
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                # stale or dropped session: drop it and try a fresh one once
+                self._drop_session(session)
+                if attempt:
+                    raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                # The server answered and refused this message (bad address,
+                # rejected content); smtplib has already reset the transaction,
+                # so the session stays open for the rest of the batch.
+                self._sent_in_session += 1
+                raise
+            except smtplib.SMTPException:
+                raise
+            except OSError:
+                # socket-level failure: the session is gone
+                self._drop_session(session)
+                if attempt:
+                    raise
+
+    def _drop_session(self, session: smtplib.SMTP) -> None:
+        session.close()
+        self._session = None
+
+    def send_batch(self, messages: Iterable[Tuple[str, str, str]]) -> list:
+        """
+        Sends (target, subject, body) tuples and returns a SendResult for each.
+        """
+        results = []
+        for target, subject, body in messages:
+            try:
+                self.send(target, subject, body)
+                results.append(SendResult(target, True))
+            except (smtplib.SMTPException, OSError) as e:
+                results.append(SendResult(target, False, str(e)))
+        return results
+
+
+def deliver(target: str, subject: str, body: str) -> None:
+    """
+    Sends a single email and lets SMTP errors propagate to the caller.
+    """
+    with BatchMailer() as mailer:
+        mailer.send(target, subject, body)
+
+
+def send_mail(
+    target: str,
+    subject: str = "Borrowed Book Notification",
+    body: str = "You have borrowed a book. Please return it on time.",
+) -> None:
+    """
+    Sends an email to the target address with the given subject and body.
+    """
+    try:
+        deliver(target, subject, body)
     except smtplib.SMTPException as e:
         # Proper error handling
         print(f"Failed to send email to {target}: {e}")
@@ -0,0 +1,165 @@
+import random
+import smtplib
+import threading
+import uuid
+
+import pymysql
+
+from database import pool
+from notif import BatchMailer
+
+
+def enqueue_mail(cursor, recipient: str, subject: str, body: str) -> None:
+    """
+    Queues an email inside the caller's transaction, so it is only sent if
+    the surrounding work commits.
+    """
+    cursor.execute(
+        "INSERT INTO mail_outbox (recipient, subject, body) VALUES (%s, %s, %s)",
+        (recipient, subject, body),
+    )
+
+
+class OutboxDispatcher:
+    """
+    Background worker that drains mail_outbox.
+
+    Rows are claimed with a single UPDATE so several server processes can run
+    a dispatcher side by side. A claim expires after `claim_seconds`, which
+    lets another worker pick up mail left behind by a crashed process. Failed
+    sends are retried with exponential backoff until `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 5.0,
+        batch_size: int = 20,
+        max_attempts: int = 6,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        claim_seconds: int = 300,
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.claim_seconds = claim_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Ask the worker to poll now instead of waiting for the next tick."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sent = self.run_once()
+            except Exception as e:
+                print(f"❌ Outbox dispatcher error: {e}")
+                sent = 0
+            # keep draining while there is a backlog
+            if sent < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self) -> int:
+        """Claims one batch of due emails and tries to send them."""
+        rows = self._claim()
+        if not rows:
+            return 0
+        # one SMTP session for the whole batch
+        with BatchMailer() as mailer:
+            for row in rows:
+                try:
+                    mailer.send(row["recipient"], row["subject"], row["body"])
+                except (smtplib.SMTPException, OSError) as e:
+                    self._mark_failed(row, e)
+                else:
+                    self._mark_sent(row)
+        return len(rows)
+
+    def _claim(self) -> list:
+        token = uuid.uuid4().hex
+        with pool.connection() as db:
+            with db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE mail_outbox
+                    SET status = 'sending',
+                        claim_token = %s,
+                        locked_until = NOW() + INTERVAL %s SECOND
+                    WHERE (status = 'pending' AND next_attempt_at <= NOW())
+                       OR (status = 'sending' AND locked_until < NOW())
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (token, self.claim_seconds, self.batch_size),
+                )
+                db.commit()
+                if not cursor.rowcount:
+                    return []
+                cursor.execute(
+                    "SELECT id, recipient, subject, body, attempts FROM mail_outbox WHERE claim_token = %s",
+                    (token,),
+                )
+                return cursor.fetchall()
+
+    def _mark_sent(self, row: dict) -> None:
+        with pool.connection() as db:
+            with db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE mail_outbox
+                    SET status = 'sent', sent_at = NOW(), attempts = attempts + 1,
+                        claim_token = NULL, locked_until = NULL, last_error = NULL
+                    WHERE id = %s
+                    """,
+                    (row["id"],),
+                )
+            db.commit()
+
+    def _mark_failed(self, row: dict, error: Exception) -> None:
+        attempts = row["attempts"] + 1
+        status = "failed" if attempts >= self.max_attempts else "pending"
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        delay = int(delay * random.uniform(0.8, 1.2))
+        print(f"❌ Failed to send email to {row['recipient']} (attempt {attempts}): {error}")
+        try:
+            with pool.connection() as db:
+                with db.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        UPDATE mail_outbox
+                        SET status = %s, attempts = %s,
+                            next_attempt_at = NOW() + INTERVAL %s SECOND,
+                            claim_token = NULL, locked_until = NULL, last_error = %s
+                        WHERE id = %s
+                        """,
+                        (status, attempts, delay, str(error)[:1000], row["id"]),
+                    )
+                db.commit()
+        except pymysql.MySQLError as e:
+            # the claim expires on its own and the row is retried later
+            print(f"❌ Could not record outbox failure for {row['id']}: {e}")
+
+
+dispatcher = OutboxDispatcher()
@@ -0,0 +1,150 @@
+"""
+Pre-loads book metadata for a list of ISBNs into the books table, so the
+first student to borrow a new acquisition doesn't wait on Google Books.
+
+    python prewarm_books.py acquisitions.csv --workers 8 --rate 5
+
+The CSV may have an "isbn" column; otherwise the first column is used.
+Books already in the table are skipped and ISBNs that Google Books does not
+know are written to a checkpoint file, so rerunning after an interruption
+only resolves whatever is left.
+"""
+
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from books import UpstreamError, fetch_upstream, normalize_isbn, save_books
+from database import pool
+from utils import RateLimiter
+
+
+def read_isbns(path: str, column: str = None) -> tuple:
+    """Returns (normalized unique ISBN-13s in file order, rejected raw values)."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return [], []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    wanted = (column or "isbn").lower()
+    if wanted in header:
+        index, rows = header.index(wanted), rows[1:]
+    else:
+        index = 0
+
+    isbns, rejected, seen = [], [], set()
+    for row in rows:
+        if len(row) <= index or not row[index].strip():
+            continue
+        try:
+            isbn13 = normalize_isbn(row[index])
+        except ValueError:
+            rejected.append(row[index])
+            continue
+        if isbn13 not in seen:
+            seen.add(isbn13)
+            isbns.append(isbn13)
+    return isbns, rejected
+
+
+def load_checkpoint(path: str) -> set:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def already_cached(isbns: list, chunk_size: int = 500) -> set:
+    found = set()
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            for start in range(0, len(isbns), chunk_size):
+                chunk = isbns[start : start + chunk_size]
+                cursor.execute(
+                    f"SELECT isbn FROM books WHERE isbn IN ({', '.join(['%s'] * len(chunk))})",
+                    chunk,
+                )
+                found.update(row["isbn"] for row in cursor.fetchall())
+    return found
+
+
+def resolve(isbn13: str, limiter: RateLimiter, retries: int = 2):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return fetch_upstream(isbn13)
+        except UpstreamError:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def flush(books: list) -> None:
+    if not books:
+        return
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            save_books(cursor, books)
+        db.commit()
+    books.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the books table from a CSV of ISBNs.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--column", help="CSV column holding the ISBN (default: isbn or the first column)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0, help="max upstream requests per second")
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per bulk upsert")
+    parser.add_argument("--checkpoint", help="file listing ISBNs already found missing upstream")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.csv_path}.notfound"
+    isbns, rejected = read_isbns(args.csv_path, args.column)
+    for value in rejected:
+        print(f"⚠️  Skipping invalid ISBN: {value}")
+
+    skip = already_cached(isbns) | load_checkpoint(checkpoint_path)
+    todo = [isbn for isbn in isbns if isbn not in skip]
+    print(f"📚 {len(isbns)} ISBNs, {len(isbns) - len(todo)} already done, {len(todo)} to resolve")
+
+    limiter = RateLimiter(args.rate)
+    found, missing, failed = 0, 0, 0
+    pending = []
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, ThreadPoolExecutor(
+        max_workers=args.workers
+    ) as executor:
+        futures = {executor.submit(resolve, isbn, limiter): isbn for isbn in todo}
+        try:
+            for future in as_completed(futures):
+                isbn = futures[future]
+                try:
+                    book = future.result()
+                except UpstreamError as e:
+                    failed += 1
+                    print(f"❌ {isbn}: {e}")
+                    continue
+                if book is None:
+                    missing += 1
+                    checkpoint.write(isbn + "\n")
+                    checkpoint.flush()
+                    continue
+                found += 1
+                pending.append(book)
+                if len(pending) >= args.batch_size:
+                    flush(pending)
+                    print(f"   ... {found} books saved")
+        except KeyboardInterrupt:
+            print("⏹️  Interrupted; saving what was resolved so far")
+            executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            flush(pending)
+
+    print(f"✅ Saved {found} books, {missing} not found upstream, {failed} failed (rerun to retry)")
+
+
+if __name__ == "__main__":
+    main()
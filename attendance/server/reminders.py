@@ -0,0 +1,171 @@
+import os
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import pymysql
+
+from database import pool
+from notif import BatchMailer, SMTP_RATE_PER_SECOND
+from utils import RateLimiter
+
+REMINDER_WORKERS = int(os.getenv("REMINDER_WORKERS", "4"))
+
+
+@dataclass
+class Digest:
+    srcode: str
+    fullname: str
+    email: str
+    due_tomorrow: list = field(default_factory=list)
+    overdue: list = field(default_factory=list)
+
+
+def collect_digests(cursor, today: date) -> list:
+    """
+    Loads every book due tomorrow or overdue since yesterday in one query and
+    groups them into one digest per student.
+    """
+    tomorrow = today + timedelta(days=1)
+    yesterday = today - timedelta(days=1)
+    cursor.execute(
+        """
+        SELECT b.srcode, b.bookname, b.bookauthor, b.return_date, s.fullname, s.email
+        FROM borrow b
+        JOIN student s ON b.srcode = s.srcode
+        WHERE b.return_date IN (%s, %s)
+        ORDER BY b.srcode, b.return_date
+        """,
+        (tomorrow, yesterday),
+    )
+    digests = {}
+    for row in cursor.fetchall():
+        digest = digests.get(row["srcode"])
+        if digest is None:
+            digest = digests[row["srcode"]] = Digest(
+                srcode=row["srcode"], fullname=row["fullname"], email=row["email"]
+            )
+        if row["return_date"] == tomorrow:
+            digest.due_tomorrow.append(row)
+        else:
+            digest.overdue.append(row)
+    return list(digests.values())
+
+
+def render_digest(digest: Digest) -> tuple:
+    if digest.overdue:
+        subject = "⚠️ Book Overdue - Action Required"
+    else:
+        subject = "📚 Book Due Tomorrow - Reminder"
+
+    sections = []
+    if digest.overdue:
+        lines = "\n".join(
+            f"- {book['bookname']} by {book['bookauthor']} (due {book['return_date']}, OVERDUE)"
+            for book in digest.overdue
+        )
+        sections.append(
+            f"The following borrowed books are now overdue:\n{lines}\n\n"
+            "Please return them as soon as possible."
+        )
+    if digest.due_tomorrow:
+        lines = "\n".join(
+            f"- {book['bookname']} by {book['bookauthor']} (due {book['return_date']})"
+            for book in digest.due_tomorrow
+        )
+        sections.append(
+            f"This is a friendly reminder that these books are due tomorrow:\n{lines}\n\n"
+            "Please return them on time to avoid any penalties."
+        )
+
+    body = f"""Hi {digest.fullname},
+
+{chr(10).join(sections)}
+
+Thank you,
+Batangas State University Mabini Campus Library
+"""
+    return digest.email, subject, body
+
+
+def _already_notified(cursor, run_date: date) -> set:
+    cursor.execute(
+        "SELECT srcode FROM notification_log WHERE run_date = %s", (run_date,)
+    )
+    return {row["srcode"] for row in cursor.fetchall()}
+
+
+def _record_sent(digest: Digest, run_date: date) -> None:
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT IGNORE INTO notification_log (run_date, srcode, email, book_count)
+                VALUES (%s, %s, %s, %s)
+                """,
+                (
+                    run_date,
+                    digest.srcode,
+                    digest.email,
+                    len(digest.due_tomorrow) + len(digest.overdue),
+                ),
+            )
+        db.commit()
+
+
+def _send_chunk(digests: list, run_date: date, limiter: RateLimiter) -> dict:
+    sent, failed = 0, 0
+    with BatchMailer(limiter=limiter) as mailer:
+        for digest in digests:
+            target, subject, body = render_digest(digest)
+            try:
+                mailer.send(target, subject, body)
+            except (smtplib.SMTPException, OSError) as e:
+                failed += 1
+                print(f"❌ Failed to send reminder to {target}: {e}")
+                continue
+            sent += 1
+            try:
+                _record_sent(digest, run_date)
+            except pymysql.MySQLError as e:
+                # worst case a rerun sends this student the digest again
+                print(f"❌ Could not record reminder for {digest.srcode}: {e}")
+        handshakes = mailer.handshakes
+    return {"sent": sent, "failed": failed, "handshakes": handshakes}
+
+
+def run_overdue_notifications(today: date = None, workers: int = REMINDER_WORKERS) -> dict:
+    """
+    Sends one digest email per student covering books due tomorrow and books
+    that became overdue yesterday. Students already recorded in
+    notification_log for this run date are skipped, so a rerun after a crash
+    only mails whoever is left.
+    """
+    today = today or date.today()
+    with pool.connection() as db:
+        with db.cursor() as cursor:
+            digests = collect_digests(cursor, today)
+            done = _already_notified(cursor, today)
+
+    pending = [digest for digest in digests if digest.srcode not in done]
+    summary = {
+        "students": len(digests),
+        "skipped": len(digests) - len(pending),
+        "sent": 0,
+        "failed": 0,
+        "handshakes": 0,
+    }
+    if not pending:
+        return summary
+
+    # split the work evenly; every worker keeps its own SMTP session but they
+    # all share one send-rate budget
+    workers = max(1, min(workers, len(pending)))
+    chunks = [pending[i::workers] for i in range(workers)]
+    limiter = RateLimiter(SMTP_RATE_PER_SECOND)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reminder") as executor:
+        for result in executor.map(lambda chunk: _send_chunk(chunk, today, limiter), chunks):
+            for key in ("sent", "failed", "handshakes"):
+                summary[key] += result[key]
+    return summary
@@ -1,3 +1,8 @@
+import base64
+import json
+import re
+import threading
+import time
 from datetime import date, timedelta
 
 
@@ -7,6 +12,40 @@ def clean_isbn(isbn: str) -> str:
     return isbn
 
 
+def is_valid_isbn(isbn: str) -> bool:
+    return bool(re.match(r"^(97[89]\d{10}|\d{9}[\dX])$", isbn))
+
+
+def to_isbn13(isbn: str) -> str:
+    # same conversion the kiosk uses, so both sides key books identically
+    isbn = clean_isbn(isbn).upper()
+    if len(isbn) == 13:
+        return isbn
+    core = "978" + isbn[:-1]
+    total = 0
+    for idx, char in enumerate(core):
+        total += int(char) * (1 if idx % 2 == 0 else 3)
+    check_digit = (10 - (total % 10)) % 10
+    return core + str(check_digit)
+
+
+def encode_cursor(values: list) -> str:
+    # opaque pagination cursor holding the sort key of the last row
+    raw = json.dumps(values, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
 def calculate_return_date(start_date: date, return_days: int) -> date:
     # Validate input
     if return_days < 0:
@@ -26,3 +65,24 @@ def calculate_return_date(start_date: date, return_days: int) -> date:
             days_added += 1
 
     return return_date
+
+
+class RateLimiter:
+    """
+    Spaces calls out to at most `rate` per second. Safe to share between threads.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -0,0 +1,131 @@
+"""
+Soak test for the scanner preview: plays a recorded video through
+PreviewRenderer on a real Tk window for hours and checks that resident
+memory and the number of Tk images stay flat.
+
+    python bench/soak_preview.py recording.mp4 --hours 4
+
+The video loops when it ends. RSS is sampled every --sample-every seconds;
+after --warmup minutes the first sample becomes the baseline, and the run
+exits non-zero if RSS ever grows more than --max-growth-mb past it or if
+more than one Tk image exists. Needs a display (use xvfb-run on a server).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2  # noqa: E402
+import tkinter as tk  # noqa: E402
+
+from scanner import PreviewRenderer  # noqa: E402
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * PAGE_SIZE / (1024 * 1024)
+
+
+class Soak:
+    def __init__(self, root: tk.Tk, capture, args):
+        self.root = root
+        self.capture = capture
+        self.args = args
+        self.renderer = PreviewRenderer()
+        self.label = tk.Label(root)
+        self.label.pack()
+        self.started = time.monotonic()
+        self.next_sample = self.started
+        self.baseline = None
+        self.peak_growth = 0.0
+        self.frames = 0
+        self.loops = 0
+        self.failed = False
+
+    def tick(self) -> None:
+        ok, frame = self.capture.read()
+        if not ok:
+            # end of the recording: rewind and keep going
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.loops += 1
+            ok, frame = self.capture.read()
+            if not ok:
+                print("❌ Could not read frames from the video")
+                self.failed = True
+                self.root.quit()
+                return
+        photo = self.renderer.render(frame)
+        if self.label.cget("image") != str(photo):
+            self.label.configure(image=photo)
+        self.frames += 1
+
+        now = time.monotonic()
+        if now >= self.next_sample:
+            self.next_sample = now + self.args.sample_every
+            self.sample(now)
+        if now - self.started >= self.args.hours * 3600 or self.failed:
+            self.root.quit()
+            return
+        self.root.after(self.args.interval_ms, self.tick)
+
+    def sample(self, now: float) -> None:
+        elapsed = now - self.started
+        rss = rss_mb()
+        images = len(self.root.tk.call("image", "names"))
+        if self.baseline is None and elapsed >= self.args.warmup * 60:
+            self.baseline = rss
+        growth = rss - self.baseline if self.baseline is not None else 0.0
+        self.peak_growth = max(self.peak_growth, growth)
+        print(
+            f"⏱️  {elapsed / 60:7.1f} min · {self.frames} frames · loop {self.loops}"
+            f" · RSS {rss:.1f} MB ({growth:+.1f}) · Tk images {images}"
+        )
+        if growth > self.args.max_growth_mb:
+            print(f"❌ RSS grew {growth:.1f} MB past the post-warm-up baseline")
+            self.failed = True
+        if images > 1:
+            print(f"❌ {images} Tk images exist; the preview should reuse one")
+            self.failed = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the scanner preview renderer.")
+    parser.add_argument("video", help="recorded camera footage to loop")
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--interval-ms", type=int, default=33, help="delay between frames (~30 FPS)")
+    parser.add_argument("--sample-every", type=float, default=60.0, help="seconds between RSS samples")
+    parser.add_argument("--warmup", type=float, default=5.0, help="minutes before the baseline is taken")
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    capture = cv2.VideoCapture(args.video)
+    if not capture.isOpened():
+        sys.exit(f"Cannot open {args.video}")
+
+    root = tk.Tk()
+    root.title("Preview soak test")
+    soak = Soak(root, capture, args)
+    root.after(0, soak.tick)
+    try:
+        root.mainloop()
+    finally:
+        capture.release()
+        root.destroy()
+
+    print(
+        f"\n📊 {soak.frames} frames in {(time.monotonic() - soak.started) / 3600:.2f} h,"
+        f" peak RSS growth {soak.peak_growth:+.1f} MB"
+    )
+    if soak.failed:
+        sys.exit(1)
+    print("✅ Memory stayed flat")
+
+
+if __name__ == "__main__":
+    main()
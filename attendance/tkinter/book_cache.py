@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+BOOK_CACHE_PATH = os.getenv(
+    "KIOSK_BOOK_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "book_cache.db"),
+)
+
+
+@dataclass
+class CacheEntry:
+    # None means the ISBN was looked up and not found
+    data: Optional[Dict[str, Any]]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class BookCache:
+    """
+    On-disk cache of Google Books metadata keyed by ISBN-13.
+
+    Found books live for `ttl` seconds and "not found" answers for
+    `negative_ttl`. Expired entries are kept and served while a fresh copy is
+    fetched in the background. Once the cache holds more than `max_entries`, the
+    least recently used rows are evicted. A small in-memory layer in front of
+    SQLite answers repeat lookups without touching the disk.
+    """
+
+    def __init__(
+        self,
+        path: str = BOOK_CACHE_PATH,
+        ttl: float = 30 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_entries: int = 5000,
+        memory_entries: int = 256,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # last_access of memory hits, written to SQLite in batches; eviction
+        # reads last_access, so it flushes these first
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS books (
+                isbn13 TEXT PRIMARY KEY,
+                data TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_books_access ON books (last_access)")
+
+    def lookup(self, isbn13: str) -> Optional[CacheEntry]:
+        """Returns the cached entry, fresh or stale, or None if never seen."""
+        with self._lock:
+            entry = self._memory.get(isbn13)
+            if entry is not None:
+                self._memory.move_to_end(isbn13)
+                self._touched[isbn13] = time.time()
+                if len(self._touched) >= 64:
+                    self._flush_touched()
+            else:
+                row = self._db.execute(
+                    "SELECT data, expires_at FROM books WHERE isbn13 = ?", (isbn13,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                entry = CacheEntry(json.loads(row[0]) if row[0] else None, row[1])
+                self._remember(isbn13, entry)
+                self._db.execute(
+                    "UPDATE books SET last_access = ? WHERE isbn13 = ?", (time.time(), isbn13)
+                )
+            if entry.fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def put(self, isbn13: str, data: Optional[Dict[str, Any]]) -> None:
+        ttl = self.ttl if data is not None else self.negative_ttl
+        entry = CacheEntry(data, time.time() + ttl)
+        with self._lock:
+            self._remember(isbn13, entry)
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO books (isbn13, data, expires_at, last_access)
+                VALUES (?, ?, ?, ?)
+                """,
+                (isbn13, json.dumps(data) if data is not None else None, entry.expires_at, time.time()),
+            )
+            self._evict()
+
+    def note_stale_hit(self) -> None:
+        """Counts an expired entry served while a fresh copy is fetched."""
+        with self._lock:
+            self.stale_hits += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "size": size,
+            }
+
+    def _remember(self, isbn13: str, entry: CacheEntry) -> None:
+        self._memory[isbn13] = entry
+        self._memory.move_to_end(isbn13)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        self._db.executemany(
+            "UPDATE books SET last_access = ? WHERE isbn13 = ?",
+            [(accessed, isbn13) for isbn13, accessed in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        size = self._db.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        if size <= self.max_entries:
+            return
+        self._flush_touched()
+        # trim a little below the limit so inserts don't evict one row at a time
+        excess = size - int(self.max_entries * 0.9)
+        evicted = self._db.execute(
+            "SELECT isbn13 FROM books ORDER BY last_access LIMIT ?", (excess,)
+        ).fetchall()
+        self._db.executemany("DELETE FROM books WHERE isbn13 = ?", evicted)
+        for (isbn13,) in evicted:
+            self._memory.pop(isbn13, None)
+
+
+_cache: Optional[BookCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_book_cache() -> BookCache:
+    """Shared cache instance, opened on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BookCache()
+        return _cache
@@ -0,0 +1,316 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+JOURNAL_PATH = os.getenv(
+    "KIOSK_JOURNAL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "kiosk_journal.db"),
+)
+# done and rejected rows are kept this long for troubleshooting, then deleted
+JOURNAL_RETENTION_DAYS = float(os.getenv("KIOSK_JOURNAL_RETENTION_DAYS", "7"))
+
+
+@dataclass
+class JournalEntry:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    created_at: float
+    attempts: int
+
+
+class ScanJournal:
+    """Durable on-disk queue of kiosk actions that still have to reach the server."""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_journal_due ON journal (status, next_attempt_at)"
+        )
+
+    def record(self, kind: str, payload: Dict[str, Any]) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO journal (kind, payload, created_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(payload), time.time()),
+            )
+            return cursor.lastrowid
+
+    def due(self, limit: int = 100) -> List[JournalEntry]:
+        """
+        Pending actions whose retry time has come. Borrows and returns must
+        reach the server in the order they were recorded, so none is due
+        while an older borrow or return is still backing off.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT id, kind, payload, created_at, attempts FROM journal
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                AND (
+                    kind = 'attendance'
+                    OR NOT EXISTS (
+                        SELECT 1 FROM journal blocker
+                        WHERE blocker.status = 'pending'
+                        AND blocker.kind <> 'attendance'
+                        AND blocker.next_attempt_at > ?
+                        AND blocker.id < journal.id
+                    )
+                )
+                ORDER BY id LIMIT ?
+                """,
+                (now, now, limit),
+            ).fetchall()
+        return [
+            JournalEntry(id=row[0], kind=row[1], payload=json.loads(row[2]), created_at=row[3], attempts=row[4])
+            for row in rows
+        ]
+
+    def mark_done(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._db.executemany(
+                "UPDATE journal SET status = 'done', last_error = NULL WHERE id = ?",
+                [(entry_id,) for entry_id in ids],
+            )
+
+    def mark_rejected(self, entry_id: int, error: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE journal SET status = 'rejected', last_error = ? WHERE id = ?",
+                (error, entry_id),
+            )
+
+    def mark_retry(self, ids: List[int], error: str, delay: float) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._db.executemany(
+                """
+                UPDATE journal
+                SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+                """,
+                [(time.time() + delay, error, entry_id) for entry_id in ids],
+            )
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM journal WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def oldest_pending_age(self) -> Optional[float]:
+        """Seconds the oldest unsent action has been waiting, or None if empty."""
+        with self._lock:
+            oldest = self._db.execute(
+                "SELECT MIN(created_at) FROM journal WHERE status = 'pending'"
+            ).fetchone()[0]
+        return None if oldest is None else max(0.0, time.time() - oldest)
+
+    def rejected_count(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM journal WHERE status = 'rejected'"
+            ).fetchone()[0]
+
+    def prune(self, older_than_days: float = JOURNAL_RETENTION_DAYS) -> int:
+        """Deletes settled (done or rejected) actions older than the cutoff."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM journal WHERE status IN ('done', 'rejected') AND created_at < ?",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+
+class JournalReplayer:
+    """
+    Background thread that drains the journal to the backend.
+
+    Attendance scans go out together through /attendance/batch; borrow and
+    return actions are replayed one by one in the order they were recorded,
+    and one that fails holds back every borrow or return after it.
+    Network failures back off exponentially; actions the server refuses
+    (4xx) are marked rejected instead of being retried forever. While
+    offline with nothing to send it pings /health so `online` can recover,
+    and settled rows are pruned every `prune_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        journal: ScanJournal,
+        backend,
+        batch_size: int = 100,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        poll_interval: float = 5.0,
+        prune_interval: float = 3600.0,
+    ):
+        self.journal = journal
+        self.backend = backend
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self.online = True
+        self.last_success: Optional[float] = None
+        self._failures = 0
+        self._last_prune = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="journal-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                drained = self.replay_once()
+            except requests.RequestException:
+                drained = False
+                self.mark_offline()
+            except Exception as exc:  # keep the kiosk replaying whatever happens
+                print(f"Journal replay error: {exc}")
+                drained = False
+            if drained:
+                continue
+            delay = self.poll_interval
+            if self._failures:
+                delay = min(self.max_delay, self.base_delay * 2 ** (self._failures - 1))
+                delay *= random.uniform(0.8, 1.2)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def replay_once(self) -> bool:
+        """Sends one batch. Returns True if it sent a full batch and more may be waiting."""
+        self._maybe_prune()
+        entries = self.journal.due(self.batch_size)
+        if not entries:
+            if not self.online:
+                # nothing queued to prove the server is back, so ask it
+                self.backend.ping()
+                self._on_success()
+            return False
+
+        attendance = [entry for entry in entries if entry.kind == "attendance"]
+        if attendance:
+            self._replay_attendance(attendance)
+
+        for entry in entries:
+            if entry.kind == "attendance":
+                continue
+            try:
+                self.backend.send_journaled(entry.kind, entry.payload)
+            except requests.HTTPError as exc:
+                if exc.response is not None and 400 <= exc.response.status_code < 500:
+                    self.journal.mark_rejected(entry.id, _detail(exc))
+                    continue
+                self.journal.mark_retry([entry.id], str(exc), self._retry_delay(entry))
+                raise
+            except requests.RequestException as exc:
+                # stop here: later borrows/returns must not overtake this one
+                self.journal.mark_retry([entry.id], str(exc), self._retry_delay(entry))
+                raise
+            self.journal.mark_done([entry.id])
+        self._on_success()
+        return len(entries) == self.batch_size
+
+    def _replay_attendance(self, entries: List[JournalEntry]) -> None:
+        try:
+            result = self.backend.log_attendance_batch([entry.payload for entry in entries])
+        except requests.HTTPError as exc:
+            if exc.response is not None and 400 <= exc.response.status_code < 500:
+                for entry in entries:
+                    self.journal.mark_rejected(entry.id, _detail(exc))
+                return
+            self.journal.mark_retry([e.id for e in entries], str(exc), self._retry_delay(entries[0]))
+            raise
+        except requests.RequestException as exc:
+            self.journal.mark_retry([e.id for e in entries], str(exc), self._retry_delay(entries[0]))
+            raise
+
+        done = []
+        for item in result.get("results", []):
+            entry = entries[item["index"]]
+            if item["status"] == "invalid":
+                self.journal.mark_rejected(entry.id, item.get("detail") or "invalid")
+            else:
+                # "duplicate" means the server already has this scan
+                done.append(entry.id)
+        self.journal.mark_done(done)
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        pruned = self.journal.prune()
+        if pruned:
+            print(f"🧹 Pruned {pruned} settled journal entries")
+
+    def _retry_delay(self, entry: JournalEntry) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** entry.attempts)
+
+    def _on_success(self) -> None:
+        self.online = True
+        self._failures = 0
+        self.last_success = time.time()
+
+    def mark_offline(self) -> None:
+        """Called when any backend call fails to connect."""
+        self.online = False
+        self._failures += 1
+
+
+def _detail(exc: requests.HTTPError) -> str:
+    try:
+        return exc.response.json().get("detail") or str(exc)
+    except ValueError:
+        return str(exc)
+
+
+def scanned_now() -> str:
+    """Local scan timestamp as sent to /attendance/batch."""
+    return datetime.now().astimezone().isoformat()
@@ -0,0 +1,409 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageTk
+
+try:
+    import cv2  # type: ignore[import]
+except ImportError as exc:  # pragma: no cover
+    raise SystemExit(
+        "OpenCV (cv2) is required. Install with `pip install opencv-python`."
+    ) from exc
+
+try:
+    from pyzbar import pyzbar  # type: ignore[import]
+    from pyzbar.pyzbar import ZBarSymbol  # type: ignore[import]
+except ImportError as exc:  # pragma: no cover
+    raise SystemExit(
+        "pyzbar is required. Install with `pip install pyzbar` and ensure zbar is installed."
+    ) from exc
+
+import numpy as np  # installed with opencv-python
+
+
+def decode_qr(gray) -> Optional[Tuple[str, Tuple[int, int, int, int]]]:
+    """Returns (payload, (left, top, width, height)) of the first QR code found."""
+    decoded = pyzbar.decode(gray, symbols=[ZBarSymbol.QRCODE])
+    if not decoded:
+        return None
+    return decoded[0].data.decode("utf-8"), tuple(decoded[0].rect)
+
+
+class AdaptiveDecoder:
+    """
+    Decides how much work to spend on each grayscale frame.
+
+    In order, it:
+    - skips frames that are flat (camera covered, empty wall) or that barely
+      changed since the last miss, rechecking a static scene every
+      `recheck_interval` seconds so a code held perfectly still is still read;
+    - decodes the full-resolution crop around where a code was last seen;
+    - decodes a downscaled copy of the whole frame;
+    - decodes the full-resolution crop around the busiest high-contrast
+      region of the downscaled frame, for codes too small to read scaled down;
+    - every `full_frame_every` misses, falls back to the full frame.
+
+    With `adaptive=False` every frame is decoded at full resolution.
+    """
+
+    def __init__(
+        self,
+        adaptive: bool = True,
+        scale: float = 0.5,
+        motion_threshold: float = 4.0,
+        min_contrast: float = 12.0,
+        recheck_interval: float = 1.0,
+        track_seconds: float = 2.0,
+        full_frame_every: int = 15,
+    ):
+        self.adaptive = adaptive
+        self.scale = scale
+        self.motion_threshold = motion_threshold
+        self.min_contrast = min_contrast
+        self.recheck_interval = recheck_interval
+        self.track_seconds = track_seconds
+        self.full_frame_every = full_frame_every
+        self.counts = {"skipped": 0, "tracked": 0, "downscaled": 0, "candidate": 0, "full": 0}
+        self.reset()
+
+    def reset(self) -> None:
+        self._previous = None
+        self._last_decode_at = 0.0
+        self._last_rect = None
+        self._last_seen_at = 0.0
+        self._misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+    def decode(self, gray) -> Optional[str]:
+        if not self.adaptive:
+            return self._hit("full", decode_qr(gray))
+
+        now = time.monotonic()
+        if self._should_skip(gray, now):
+            self.counts["skipped"] += 1
+            return None
+        self._last_decode_at = now
+
+        if self._last_rect is not None and now - self._last_seen_at < self.track_seconds:
+            found = self._decode_crop(gray, self._last_rect)
+            if found:
+                return self._hit("tracked", found, now)
+
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        found = decode_qr(small)
+        if found:
+            left, top, width, height = found[1]
+            rect = tuple(int(v / self.scale) for v in (left, top, width, height))
+            return self._hit("downscaled", (found[0], rect), now)
+
+        candidate = self._find_candidate(small)
+        if candidate is not None:
+            found = self._decode_crop(gray, candidate)
+            if found:
+                return self._hit("candidate", found, now)
+
+        self._misses += 1
+        if self._misses >= self.full_frame_every:
+            self._misses = 0
+            return self._hit("full", decode_qr(gray), now)
+        return None
+
+    def _should_skip(self, gray, now: float) -> bool:
+        thumb = cv2.resize(gray, (80, 60), interpolation=cv2.INTER_AREA)
+        previous, self._previous = self._previous, thumb
+        if thumb.std() < self.min_contrast:
+            return True
+        if previous is None or now - self._last_decode_at >= self.recheck_interval:
+            return False
+        return cv2.absdiff(thumb, previous).mean() < self.motion_threshold
+
+    def _decode_crop(self, gray, rect):
+        left, top, width, height = rect
+        # pad generously: the code moves between frames and zbar needs a quiet zone
+        pad = max(width, height) // 2 + 16
+        x0, y0 = max(0, left - pad), max(0, top - pad)
+        x1 = min(gray.shape[1], left + width + pad)
+        y1 = min(gray.shape[0], top + height + pad)
+        found = decode_qr(gray[y0:y1, x0:x1])
+        if not found:
+            return None
+        cl, ct, cw, ch = found[1]
+        return found[0], (cl + x0, ct + y0, cw, ch)
+
+    def _find_candidate(self, small):
+        """Bounding box, in full-resolution pixels, of the largest high-detail blob."""
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, kernel)
+        _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9)))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+        if w < 8 or h < 8:
+            return None
+        return tuple(int(v / self.scale) for v in (x, y, w, h))
+
+    def _hit(self, strategy: str, found, now: Optional[float] = None) -> Optional[str]:
+        if not found:
+            return None
+        self.counts[strategy] += 1
+        self._misses = 0
+        self._last_rect = found[1]
+        self._last_seen_at = now if now is not None else time.monotonic()
+        return found[0]
+
+
+_warm_capture = None
+_warm_lock = threading.Lock()
+
+
+def warm_camera(device: int = 0) -> bool:
+    """
+    Opens the camera ahead of the first scan and keeps it open; the next
+    `open_camera` call takes it over. Opening a webcam (driver start-up,
+    auto-exposure) is the slowest part of starting a scan.
+    """
+    global _warm_capture
+    # held for the whole open so a scan started meanwhile waits for this
+    # capture instead of fighting over the device
+    with _warm_lock:
+        if _warm_capture is not None:
+            return True
+        capture = cv2.VideoCapture(device)
+        if not capture.isOpened():
+            capture.release()
+            return False
+        capture.read()
+        _warm_capture = capture
+        return True
+
+
+def open_camera(device: int = 0):
+    global _warm_capture
+    with _warm_lock:
+        capture, _warm_capture = _warm_capture, None
+    return capture if capture is not None else cv2.VideoCapture(device)
+
+
+def release_warm_camera() -> None:
+    global _warm_capture
+    with _warm_lock:
+        capture, _warm_capture = _warm_capture, None
+    if capture is not None:
+        capture.release()
+
+
+class LatestSlot:
+    """
+    Single-item hand-off between threads where the newest item wins.
+
+    Putting an item while the previous one is still unread replaces it and
+    counts it as dropped, so a slow consumer never builds up a backlog.
+    """
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def take(self, timeout: Optional[float] = None):
+        """Returns the pending item, waiting up to `timeout` (0 = don't wait)."""
+        with self._cond:
+            if self._item is None and timeout and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class ScannerStats:
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self.capture_fps = 0.0
+        self.decode_ms = 0.0
+        self.frames_captured = 0
+        self.frames_decoded = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+
+    def frame_captured(self) -> None:
+        with self._lock:
+            self.frames_captured += 1
+            self._window_frames += 1
+            elapsed = time.monotonic() - self._window_start
+            if elapsed >= 1.0:
+                self.capture_fps = self._window_frames / elapsed
+                self._window_start += elapsed
+                self._window_frames = 0
+
+    def frame_decoded(self, seconds: float) -> None:
+        with self._lock:
+            self.frames_decoded += 1
+            ms = seconds * 1000
+            if self.frames_decoded == 1:
+                self.decode_ms = ms
+            else:
+                self.decode_ms += self.smoothing * (ms - self.decode_ms)
+
+
+class ScannerPipeline:
+    """
+    Camera capture and QR decoding on their own threads.
+
+    The capture thread reads and mirrors frames and hands them to two
+    latest-frame-wins slots: one for the preview, one for the decode worker.
+    Frames the consumers were too slow to pick up are dropped and counted.
+    The Tk thread only polls `take_preview()` and `take_result()`, so a slow
+    decode never stalls the UI.
+    """
+
+    def __init__(self, device: int = 0, decoder: Optional[AdaptiveDecoder] = None):
+        self.device = device
+        self.decoder = decoder or AdaptiveDecoder(
+            adaptive=os.getenv("KIOSK_ADAPTIVE_DECODE", "1") != "0"
+        )
+        self.stats = ScannerStats()
+        self._preview = LatestSlot()
+        self._decode_slot = LatestSlot()
+        self._result: Optional[str] = None
+        self._result_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._capture = None
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self) -> bool:
+        """Opens the camera and starts both threads. Returns False if the camera is unavailable."""
+        if self.running:
+            return True
+        capture = open_camera(self.device)
+        if not capture.isOpened():
+            capture.release()
+            return False
+        self._capture = capture
+        self._stop.clear()
+        self._preview = LatestSlot()
+        self._decode_slot = LatestSlot()
+        self._result = None
+        self.stats = ScannerStats()
+        self.decoder.reset()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="scanner-capture", daemon=True),
+            threading.Thread(target=self._decode_loop, name="scanner-decode", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._preview.close()
+        self._decode_slot.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self._threads = []
+
+    def take_preview(self):
+        """Latest mirrored BGR frame not yet shown, or None."""
+        return self._preview.take()
+
+    def take_result(self) -> Optional[str]:
+        """Decoded QR payload, handed out once."""
+        with self._result_lock:
+            result, self._result = self._result, None
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "capture_fps": round(self.stats.capture_fps, 1),
+            "decode_ms": round(self.stats.decode_ms, 1),
+            "frames_captured": self.stats.frames_captured,
+            "frames_decoded": self.stats.frames_decoded,
+            "dropped_decode": self._decode_slot.dropped,
+            "dropped_preview": self._preview.dropped,
+            "decoder": self.decoder.stats(),
+        }
+
+    def _capture_loop(self) -> None:
+        capture = self._capture
+        try:
+            while not self._stop.is_set():
+                ret, frame = capture.read()
+                if not ret:
+                    time.sleep(0.05)
+                    continue
+                frame = cv2.flip(frame, 1)
+                self.stats.frame_captured()
+                self._preview.put(frame)
+                self._decode_slot.put(frame)
+        finally:
+            # VideoCapture isn't safe to release while another thread reads it
+            capture.release()
+
+    def _decode_loop(self) -> None:
+        while not self._stop.is_set():
+            frame = self._decode_slot.take(timeout=0.5)
+            if frame is None:
+                continue
+            started = time.perf_counter()
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            data = self.decoder.decode(gray)
+            self.stats.frame_decoded(time.perf_counter() - started)
+            if data:
+                with self._result_lock:
+                    self._result = data
+                # one token per scan session; the frame stops the pipeline
+                return
+
+
+class PreviewRenderer:
+    """
+    Draws camera frames into one reused PhotoImage.
+
+    Frames are resized and converted into buffers allocated once up front;
+    the PIL image wraps the RGBA buffer without copying, and `paste` updates
+    the existing Tk image instead of creating a new one per frame. Call
+    `render` on the Tk thread.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (640, 480)):
+        width, height = size
+        self.size = size
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgba = np.empty((height, width, 4), dtype=np.uint8)
+        self._rgba[..., 3] = 255
+        # RGBA is one of the modes PIL can map straight onto a numpy buffer
+        self._image = Image.frombuffer("RGBA", size, self._rgba, "raw", "RGBA", 0, 1)
+        self.photo: Optional[ImageTk.PhotoImage] = None
+
+    def render(self, frame) -> ImageTk.PhotoImage:
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage("RGBA", self.size)
+        if frame.shape[1] != self.size[0] or frame.shape[0] != self.size[1]:
+            cv2.resize(frame, self.size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            frame = self._resized
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self._rgba)
+        self.photo.paste(self._image)
+        return self.photo
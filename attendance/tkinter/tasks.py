@@ -0,0 +1,276 @@
+import threading
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TaskHandle:
+    def __init__(self, owner: Any, key: Optional[Hashable]):
+        self.owner = owner
+        self.key = key
+        self.cancelled = False
+        self.submitted_at = time.monotonic()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TaskStats:
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+        self.avg_wait_ms = 0.0
+
+    def started(self, waited: float) -> None:
+        self.queued -= 1
+        self.running += 1
+        self.avg_wait_ms += self.smoothing * (waited * 1000 - self.avg_wait_ms)
+
+    def skipped(self) -> None:
+        # cancelled before it ran: already counted in `cancelled`, so it is
+        # neither completed nor part of the timing averages
+        self.running -= 1
+
+    def finished(self, seconds: float, ok: bool) -> None:
+        self.running -= 1
+        self.completed += 1
+        self.failed += 0 if ok else 1
+        ms = seconds * 1000
+        self.avg_ms += self.smoothing * (ms - self.avg_ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "avg_ms": round(self.avg_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "avg_wait_ms": round(self.avg_wait_ms, 1),
+        }
+
+
+class TaskRunner:
+    """
+    Runs blocking work (backend calls, lookups) on a bounded pool and hands
+    the outcome back to the Tk thread with `after()`.
+
+    `on_success(result)` or `on_error(exc)` is called on the Tk thread, then
+    `on_done()`, which always runs so the caller can re-enable its buttons.
+    Cancelling a task (directly or through `cancel_owner`) can't interrupt a
+    request already on the wire, but its success/error callbacks are
+    skipped, and a task cancelled while still queued never runs.
+
+    Submitting with a `key` makes it "latest request wins" for that owner:
+    any earlier task with the same owner and key is cancelled, so repeated
+    clicks don't pile up work and a slow old answer can't overwrite a newer
+    one.
+    """
+
+    def __init__(self, root: tk.Misc, max_workers: int = 4):
+        self.root = root
+        self.on_busy_changed: Optional[Callable[[int], None]] = None
+        self.stats = TaskStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kiosk-task")
+        self._lock = threading.Lock()
+        self._handles: Dict[int, List[TaskHandle]] = {}
+        self._latest: Dict[Tuple[int, Hashable], TaskHandle] = {}
+        self._in_flight = 0
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_done: Optional[Callable[[], None]] = None,
+        owner: Any = None,
+        key: Optional[Hashable] = None,
+        **kwargs,
+    ) -> TaskHandle:
+        handle = TaskHandle(owner, key)
+        with self._lock:
+            if key is not None:
+                previous = self._latest.get((id(owner), key))
+                if previous is not None:
+                    self._cancel(previous)
+                self._latest[(id(owner), key)] = handle
+            self._handles.setdefault(id(owner), []).append(handle)
+            self._in_flight += 1
+            self.stats.queued += 1
+        self._notify_busy()
+
+        def work():
+            with self._lock:
+                self.stats.started(time.monotonic() - handle.submitted_at)
+            if handle.cancelled:
+                with self._lock:
+                    self.stats.skipped()
+                # still finish on the Tk thread so on_done runs and in_flight drops
+                self.root.after(0, lambda: self._finish(handle, None, None, on_done))
+                return
+            started = time.perf_counter()
+            ok = True
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:  # handed to on_error on the Tk thread
+                ok = False
+                # SystemExit and friends would otherwise skip _finish and leave
+                # the progress bar spinning; on_error only ever sees an Exception
+                error = exc if isinstance(exc, Exception) else RuntimeError(repr(exc))
+                # bind error now: exc is cleared when the except block ends
+                self.root.after(0, lambda error=error: self._finish(handle, on_error, error, on_done))
+                if isinstance(exc, KeyboardInterrupt):
+                    raise
+            else:
+                self.root.after(0, lambda: self._finish(handle, on_success, result, on_done))
+            finally:
+                with self._lock:
+                    self.stats.finished(time.perf_counter() - started, ok)
+
+        self._executor.submit(work)
+        return handle
+
+    def cancel_owner(self, owner: Any) -> None:
+        with self._lock:
+            for handle in self._handles.get(id(owner), []):
+                self._cancel(handle)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return self.stats.snapshot()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel(self, handle: TaskHandle) -> None:
+        if not handle.cancelled:
+            handle.cancel()
+            self.stats.cancelled += 1
+
+    def _finish(self, handle: TaskHandle, callback, value, on_done) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            handles = self._handles.get(id(handle.owner), [])
+            if handle in handles:
+                handles.remove(handle)
+            if not handles:
+                self._handles.pop(id(handle.owner), None)
+            if self._latest.get((id(handle.owner), handle.key)) is handle:
+                del self._latest[(id(handle.owner), handle.key)]
+        try:
+            if callback and not handle.cancelled:
+                callback(value)
+        finally:
+            if on_done:
+                on_done()
+            self._notify_busy()
+
+    def _notify_busy(self) -> None:
+        if self.on_busy_changed:
+            self.on_busy_changed(self.in_flight())
+
+
+class Prefetcher:
+    """
+    Speculative background fetches for the student whose QR was just
+    scanned, cached per (token, name) for `ttl` seconds.
+
+    `get` hands a cached answer over immediately, waits for a fetch that is
+    still in flight, or calls `fallback` when nothing usable was prefetched
+    (the fetch failed, expired or never started), so the screen can make its
+    own request and report errors as usual. Only one token is kept: starting
+    a prefetch for a new student drops the previous one's results. All
+    methods run on the Tk thread.
+    """
+
+    def __init__(self, runner: TaskRunner, ttl: float = 60.0):
+        self.runner = runner
+        self.ttl = ttl
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+        self._token: Optional[str] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, token: str, name: str, fn: Callable[..., Any], *args) -> None:
+        if token != self._token:
+            self.clear()
+            self._token = token
+        entry = self._entries.get(name)
+        if entry and (entry["state"] == "pending" or self._fresh(entry)):
+            return
+        entry = {"state": "pending", "value": None, "at": 0.0, "waiters": []}
+        self._entries[name] = entry
+        self.runner.submit(
+            fn,
+            *args,
+            owner=self,
+            key=name,
+            on_success=lambda value: self._settle(entry, "done", value),
+            on_error=lambda exc: self._settle(entry, "failed", exc),
+        )
+
+    def get(
+        self,
+        token: str,
+        name: str,
+        on_ready: Callable[[Any], None],
+        fallback: Callable[[], None],
+    ) -> None:
+        entry = self._entries.get(name) if token == self._token else None
+        if entry is None or entry["state"] == "failed" or (
+            entry["state"] == "done" and not self._fresh(entry)
+        ):
+            self.misses += 1
+            fallback()
+        elif entry["state"] == "pending":
+            self.waits += 1
+            entry["waiters"].append((on_ready, fallback))
+        else:
+            self.hits += 1
+            on_ready(entry["value"])
+
+    def invalidate(self, token: str, name: str) -> None:
+        """Drops a cached answer after the student changed it (borrowed, returned...)."""
+        if token == self._token:
+            self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        self.runner.cancel_owner(self)
+        for entry in self._entries.values():
+            # nobody is left to use these answers; let the screens fetch for themselves
+            for _, fallback in entry["waiters"]:
+                fallback()
+        self._entries = {}
+        self._token = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "waits": self.waits, "misses": self.misses}
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return entry["state"] == "done" and time.monotonic() - entry["at"] < self.ttl
+
+    def _settle(self, entry: Dict[str, Any], state: str, value: Any) -> None:
+        entry["state"] = state
+        entry["value"] = value if state == "done" else None
+        entry["at"] = time.monotonic()
+        waiters, entry["waiters"] = entry["waiters"], []
+        for on_ready, fallback in waiters:
+            if state == "done":
+                on_ready(value)
+            else:
+                fallback()
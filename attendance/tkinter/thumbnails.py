@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Optional, Tuple
+
+import requests
+from PIL import Image, ImageTk
+
+THUMBNAIL_DIR = os.getenv(
+    "KIOSK_THUMBNAIL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnails"),
+)
+
+
+class ThumbnailLoader:
+    """
+    Fetches, decodes and resizes book covers off the Tk thread.
+
+    Resized covers are kept as PNG files in `cache_dir`, bounded by
+    `max_files` and `max_bytes`; the least recently used files are deleted
+    first (a cache hit refreshes the file's mtime). Only the final
+    PhotoImage is created on the Tk thread, via `after()`, since Tk images
+    must not be touched from worker threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = THUMBNAIL_DIR,
+        size: Tuple[int, int] = (120, 180),
+        max_files: int = 2000,
+        max_bytes: int = 50 * 1024 * 1024,
+        workers: int = 2,
+    ):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._evict_lock = threading.Lock()
+        self._placeholder: Optional[ImageTk.PhotoImage] = None
+
+    def placeholder(self) -> ImageTk.PhotoImage:
+        """Neutral cover shown while the real one loads. Call on the Tk thread."""
+        if self._placeholder is None:
+            self._placeholder = ImageTk.PhotoImage(Image.new("RGB", self.size, "#333"))
+        return self._placeholder
+
+    def load(
+        self,
+        widget: tk.Misc,
+        url: str,
+        on_ready: Callable[[ImageTk.PhotoImage], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        """Loads `url` in the background and calls `on_ready` on the Tk thread."""
+
+        def work():
+            try:
+                image = self._get_image(url)
+            except (requests.RequestException, OSError) as exc:
+                if on_error:
+                    widget.after(0, lambda exc=exc: on_error(exc))
+                return
+            widget.after(0, lambda: on_ready(ImageTk.PhotoImage(image)))
+
+        self._executor.submit(work)
+
+    def _path_for(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".png")
+
+    def _get_image(self, url: str) -> Image.Image:
+        path = self._path_for(url)
+        try:
+            with Image.open(path) as cached:
+                image = cached.copy()
+            os.utime(path)
+            return image
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # corrupt cache file; fetch it again
+            os.remove(path)
+
+        response = requests.get(url, timeout=(3.05, 10))
+        response.raise_for_status()
+        with Image.open(BytesIO(response.content)) as fetched:
+            image = fetched.convert("RGB").resize(self.size)
+
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+        self._evict()
+        return image
+
+    def _evict(self) -> None:
+        with self._evict_lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            entries.sort()
+            while entries and (len(entries) > self.max_files or total > self.max_bytes):
+                _, size, path = entries.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size